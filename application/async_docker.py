@@ -0,0 +1,346 @@
+import asyncio
+import json
+import os
+import ssl
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Iterator
+from typing import Any
+from urllib.parse import quote, urlencode, urlsplit
+
+from docker.api import APIClient
+from docker.errors import DockerException
+from docker.tls import TLSConfig
+from docker.utils import parse_host
+
+IS_WINDOWS = os.name == "nt"
+
+
+class AsyncDockerError(DockerException):
+    def __init__(self, status: int, message: str) -> None:
+        self.status = status
+        self.message = message
+        super().__init__(f"{status}: {message}")
+
+
+class UnsupportedDockerHost(DockerException):
+    pass
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """Whether a request failing with `error` may succeed when retried.
+
+    Lost connections and daemon-side errors are transient; client errors such
+    as a removed container (404) are not.
+    """
+    if isinstance(error, AsyncDockerError):
+        return error.status >= 500
+    return isinstance(error, (OSError, asyncio.IncompleteReadError))
+
+
+def response_error(status: int, body: bytes) -> AsyncDockerError:
+    try:
+        message = json.loads(body).get("message", "")
+    except (ValueError, AttributeError):
+        message = body.decode(errors="replace")
+    return AsyncDockerError(status, message)
+
+
+def ssl_context(tls: TLSConfig) -> ssl.SSLContext:
+    """An SSL context verifying the daemon and presenting the client
+    certificate the way docker-py's `TLSConfig` does."""
+    ca_cert = tls.verify if isinstance(tls.verify, str) else tls.ca_cert
+    context = ssl.create_default_context(cafile=ca_cert)
+    if not tls.verify:
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    if tls.cert:
+        context.load_cert_chain(*tls.cert)
+    return context
+
+
+Connection = tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+class DockerApi(ABC):
+    """The Docker Engine API requests the application makes, see
+    `AsyncDockerClient` and `ThreadedDockerClient`."""
+
+    version: str
+
+    async def close(self) -> None:
+        pass
+
+    @abstractmethod
+    async def request(
+        self,
+        method: str,
+        path: str,
+        params: dict[str, Any] | None = None,
+        body: Any = None,
+    ) -> bytes:
+        """Send a request and return the whole response body."""
+
+    @abstractmethod
+    def stream(
+        self, path: str, params: dict[str, Any] | None = None
+    ) -> AsyncIterator[bytes]:
+        """Yield the body of a GET request as it arrives, i.e a followed stream."""
+
+    async def get_json(self, path: str, params: dict[str, Any] | None = None) -> Any:
+        return json.loads(await self.request("GET", path, params))
+
+    async def stream_json(
+        self, path: str, params: dict[str, Any] | None = None
+    ) -> AsyncIterator[Any]:
+        """Yield the JSON documents of a stream, one per line."""
+        buffer = b""
+        async for chunk in self.stream(path, params):
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield json.loads(line)
+
+
+class AsyncDockerClient(DockerApi):
+    """Minimal asyncio client for the Docker Engine API.
+
+    Requests are plain HTTP/1.1 over the docker socket or a TCP host, with TLS
+    if configured, read on the event loop: a stream costs a connection, not a
+    thread. Connections of finished requests are kept alive and reused;
+    streams get a connection of their own, closed when the stream ends.
+
+    Named pipes and ssh hosts aren't supported, see `ThreadedDockerClient`.
+    """
+
+    READ_LIMIT = 1024 * 1024
+
+    def __init__(
+        self,
+        base_url: str | None = None,
+        version: str = "1.41",
+        max_idle: int = 4,
+        tls: TLSConfig | None = None,
+    ) -> None:
+        url = urlsplit(
+            parse_host(
+                base_url or os.environ.get("DOCKER_HOST"), IS_WINDOWS, tls=bool(tls)
+            )
+        )
+        self._ssl: ssl.SSLContext | None = None
+        if url.scheme == "http+unix":
+            self._socket_path: str | None = url.path
+            self._address = None
+        elif url.scheme in ("http", "https"):
+            self._socket_path = None
+            self._address = (url.hostname, url.port or 2375)
+            if url.scheme == "https":
+                self._ssl = ssl_context(tls or TLSConfig())
+        else:
+            raise UnsupportedDockerHost(f"Unsupported docker host: {url.geturl()}")
+        self.version = version
+        self._max_idle = max_idle
+        self._idle: list[Connection] = []
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for _, writer in idle:
+            writer.close()
+
+    async def _connect(self) -> Connection:
+        if self._socket_path is not None:
+            return await asyncio.open_unix_connection(
+                self._socket_path, limit=self.READ_LIMIT
+            )
+        return await asyncio.open_connection(
+            *self._address, ssl=self._ssl, limit=self.READ_LIMIT
+        )
+
+    def _release(self, connection: Connection) -> None:
+        writer = connection[1]
+        if len(self._idle) < self._max_idle and not writer.is_closing():
+            self._idle.append(connection)
+        else:
+            writer.close()
+
+    def _target(self, path: str, params: dict[str, Any] | None) -> str:
+        query = urlencode(
+            {
+                key: int(value) if isinstance(value, bool) else value
+                for key, value in (params or {}).items()
+                if value is not None
+            }
+        )
+        return f"/v{self.version}{quote(path)}" + (f"?{query}" if query else "")
+
+    async def _send(
+        self,
+        connection: Connection,
+        method: str,
+        path: str,
+        params: dict[str, Any] | None,
+        body: Any,
+    ) -> tuple[int, dict[str, str]]:
+        reader, writer = connection
+        payload = b"" if body is None else json.dumps(body).encode()
+        head = [
+            f"{method} {self._target(path, params)} HTTP/1.1",
+            "Host: docker",
+            f"Content-Length: {len(payload)}",
+        ]
+        if payload:
+            head.append("Content-Type: application/json")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + payload)
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Connection closed by the daemon")
+        status = int(status_line.split()[1])
+        headers: dict[str, str] = {}
+        while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        return status, headers
+
+    async def _body(
+        self, reader: asyncio.StreamReader, headers: dict[str, str]
+    ) -> AsyncIterator[bytes]:
+        """Yield the body as it arrives, one HTTP chunk at a time if chunked."""
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                size_line = await reader.readline()
+                if not size_line:
+                    raise ConnectionResetError("Connection closed by the daemon")
+                size = int(size_line.split(b";")[0], 16)
+                if size == 0:
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass  # Trailers
+                    return
+                data = await reader.readexactly(size)
+                await reader.readexactly(2)
+                yield data
+        elif "content-length" in headers:
+            remaining = int(headers["content-length"])
+            while remaining:
+                data = await reader.read(min(remaining, self.READ_LIMIT))
+                if not data:
+                    raise asyncio.IncompleteReadError(b"", remaining)
+                remaining -= len(data)
+                yield data
+        else:
+            while data := await reader.read(self.READ_LIMIT):
+                yield data
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        params: dict[str, Any] | None = None,
+        body: Any = None,
+    ) -> bytes:
+        """Send a request and return the whole response body."""
+        reused = bool(self._idle)
+        connection = self._idle.pop() if reused else await self._connect()
+        try:
+            status, headers = await self._send(connection, method, path, params, body)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            connection[1].close()
+            if not reused:
+                raise
+            # The daemon closed the idle connection, try again on a new one.
+            return await self.request(method, path, params, body)
+        except BaseException:
+            # E.g cancelled, the response may still be on its way.
+            connection[1].close()
+            raise
+
+        try:
+            data = b"".join(
+                [chunk async for chunk in self._body(connection[0], headers)]
+            )
+        except BaseException:
+            connection[1].close()
+            raise
+        if headers.get("connection", "").lower() == "close":
+            connection[1].close()
+        else:
+            self._release(connection)
+        if status >= 400:
+            raise response_error(status, data)
+        return data
+
+    async def stream(
+        self, path: str, params: dict[str, Any] | None = None
+    ) -> AsyncIterator[bytes]:
+        connection = await self._connect()
+        try:
+            status, headers = await self._send(connection, "GET", path, params, None)
+            body = self._body(connection[0], headers)
+            if status >= 400:
+                raise response_error(status, b"".join([chunk async for chunk in body]))
+            async for chunk in body:
+                yield chunk
+        finally:
+            connection[1].close()
+
+
+class ThreadedDockerClient(DockerApi):
+    """The requests of `AsyncDockerClient` made by docker-py in threads, for
+    the hosts only docker-py can reach: named pipes (Windows) and ssh.
+
+    A stream holds a thread while waiting for its next chunk.
+    """
+
+    def __init__(self, api: APIClient) -> None:
+        self._api = api
+        self.version = api._version
+
+    def _send(
+        self,
+        method: str,
+        path: str,
+        params: dict[str, Any] | None,
+        body: Any,
+        stream: bool,
+    ):
+        return self._api.request(
+            method,
+            self._api._url("{0}", path),
+            params={
+                key: int(value) if isinstance(value, bool) else value
+                for key, value in (params or {}).items()
+                if value is not None
+            },
+            json=body,
+            stream=stream,
+            timeout=None if stream else self._api.timeout,
+        )
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        params: dict[str, Any] | None = None,
+        body: Any = None,
+    ) -> bytes:
+        response = await asyncio.to_thread(
+            self._send, method, path, params, body, False
+        )
+        if response.status_code >= 400:
+            raise response_error(response.status_code, response.content)
+        return response.content
+
+    async def stream(
+        self, path: str, params: dict[str, Any] | None = None
+    ) -> AsyncIterator[bytes]:
+        response = await asyncio.to_thread(self._send, "GET", path, params, None, True)
+        try:
+            if response.status_code >= 400:
+                content = await asyncio.to_thread(lambda: response.content)
+                raise response_error(response.status_code, content)
+            chunks: Iterator[bytes] = response.iter_content(chunk_size=None)
+            while (chunk := await asyncio.to_thread(next, chunks, None)) is not None:
+                yield chunk
+        finally:
+            response.close()
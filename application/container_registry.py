@@ -0,0 +1,109 @@
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+from docker.models.containers import Container
+
+
+class ContainerEntry:
+    """A known container, its last known status and its row in the container list."""
+
+    __slots__ = ("container", "row", "status")
+
+    def __init__(self, container: Container, status: str) -> None:
+        self.container = container
+        self.status = status
+        self.row: int | None = None
+
+    @property
+    def id(self) -> str:
+        return self.container.id
+
+    @property
+    def name(self) -> str:
+        return self.container.name
+
+    @property
+    def attrs(self) -> dict[str, Any]:
+        """Attributes as of the last time the container was fetched."""
+        return self.container.attrs
+
+
+class ContainerRegistry:
+    """Every known container, keyed by ID and also reachable by name.
+
+    Lookups, additions, status changes and renames are O(1), so docker events
+    can be applied without scanning the container list.
+    """
+
+    def __init__(self) -> None:
+        self._entries: dict[str, ContainerEntry] = {}
+        self._names: dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[ContainerEntry]:
+        return iter(list(self._entries.values()))
+
+    def __contains__(self, id_or_name: str) -> bool:
+        return self.get(id_or_name) is not None
+
+    def get(self, id_or_name: str) -> ContainerEntry | None:
+        entry = self._entries.get(id_or_name)
+        if entry is None and id_or_name in self._names:
+            entry = self._entries.get(self._names[id_or_name])
+        return entry
+
+    def containers(self) -> list[Container]:
+        return [entry.container for entry in self]
+
+    def add(self, container: Container, status: str) -> ContainerEntry:
+        """Add `container`, or replace the known container with the same ID."""
+        entry = self._entries.get(container.id)
+        if entry is None:
+            entry = self._entries[container.id] = ContainerEntry(container, status)
+        else:
+            self._names.pop(entry.name, None)
+            entry.container, entry.status = container, status
+        self._names[container.name] = container.id
+        return entry
+
+    def replace(self, containers: Iterable[tuple[Container, str]]) -> None:
+        """Forget every container and add `containers`, with their status."""
+        self._entries.clear()
+        self._names.clear()
+        for container, status in containers:
+            self.add(container, status)
+
+    def sync(self, containers: Iterable[tuple[Container, str]]) -> list[ContainerEntry]:
+        """Add or update `containers`, with their status, and remove every other
+        container. Known entries are kept, so their row is too.
+
+        Returns:
+            The removed entries.
+        """
+        ids = set()
+        for container, status in containers:
+            self.add(container, status)
+            ids.add(container.id)
+        return [
+            self.remove(container_id)
+            for container_id in list(self._entries)
+            if container_id not in ids
+        ]
+
+    def remove(self, id_or_name: str) -> ContainerEntry | None:
+        entry = self.get(id_or_name)
+        if entry is not None:
+            del self._entries[entry.id]
+            self._names.pop(entry.name, None)
+        return entry
+
+    def rename(self, container_id: str, name: str) -> ContainerEntry | None:
+        entry = self._entries.get(container_id)
+        if entry is not None:
+            self._names.pop(entry.name, None)
+            # Container.name reads the attributes, so update them in place.
+            entry.container.attrs["Name"] = f"/{name}"
+            self._names[name] = container_id
+        return entry
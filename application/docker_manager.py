@@ -1,15 +1,33 @@
+import asyncio
+import json
 import logging
-from threading import Event
 import threading
+from collections.abc import AsyncIterator
+from typing import Any
 
 import docker
 from docker.errors import DockerException
 from docker.models.containers import Container
-from docker.models.images import Image, ImageCollection
+from docker.models.images import Image
+from docker.utils import kwargs_from_env, version_lt
 from textual.logging import TextualHandler
 
+from application.async_docker import (
+    AsyncDockerClient,
+    DockerApi,
+    ThreadedDockerClient,
+    UnsupportedDockerHost,
+)
+from application.container_registry import ContainerEntry, ContainerRegistry
+from application.log_cache import LogCache
+from application.log_search import LogSearch
+from application.stats_monitor import FleetSampler, StatsMonitor, StatsStream
+from application.task_supervisor import TaskSupervisor
 from application.util.config import CONFIG_PATH, Config
-from application.widget.log_viewer import LogLines
+from application.util.container_stats import parse_stats
+from application.util.log_ingest import LogIngest
+from application.util.log_stream import LogCursor, LogStreamDecoder
+from application.util.snapshot import Snapshot
 
 logging.basicConfig(
     level="INFO",
@@ -38,57 +56,191 @@ class FailedDockerClient(Exception):
 
 
 class DockerManager:
-    def __init__(self, config: Config) -> None:
+    def __init__(self, config: Config, snapshot: Snapshot | None = None) -> None:
+        if snapshot is not None and not snapshot.containers:
+            snapshot = None  # Ask the daemon rather than show no containers.
         try:
-            self.client = docker.from_env()
+            # The API version of a snapshot spares asking the daemon for it.
+            self.client = docker.from_env(
+                version=snapshot.api_version if snapshot is not None else None
+            )
+            self.api = self._api_client()
         except DockerException as de:
             raise FailedDockerClient(str(de))
         self.config = config
-        self.containers: dict[str, Container] = {}
-        self.images: ImageCollection = None
+        self.containers = ContainerRegistry()
+        self.images: list[Image] = None
         self.selected_container: Container = None
         self.selected_image = None
+        self.supervisor = TaskSupervisor()
+        self._inspected: dict[str, dict[str, Any]] = {}
+        self._inspect_generation = 0
+        self.log_cache = LogCache(
+            self,
+            max_followed=config.log_cache_size,
+            max_lines=config.log_cache_lines,
+            session_lines=config.max_log_lines,
+        )
+        self.stats_monitor = StatsMonitor(self)
+        self.fleet_sampler = FleetSampler(self, workers=config.fleet_stats_workers)
+        self.log_search = LogSearch(self, workers=config.log_search_workers)
 
-        container_thread = threading.Thread(target=self._load_containers)
-        image_thread = threading.Thread(target=self._load_images)
+        # Until reconciled, containers and images are the snapshot's.
+        self.restored = snapshot is not None
+        if snapshot is not None:
+            self._restore(snapshot)
+        else:
+            container_thread = threading.Thread(target=self._load_containers)
+            image_thread = threading.Thread(target=self._load_images)
 
-        container_thread.start()
-        image_thread.start()
+            container_thread.start()
+            image_thread.start()
 
-        container_thread.join()
+            container_thread.join()
 
         if not self.containers:
             raise NoVisibleContainers()
 
-        self.selected_container = next(iter(self.containers.values()))
+        entry = None
+        if snapshot is not None and snapshot.selected is not None:
+            entry = self.containers.get(snapshot.selected)
+        self.selected_container = (entry or next(iter(self.containers))).container
+
+    def _api_client(self) -> DockerApi:
+        """The asyncio client, on the same host and TLS settings as `client`, or
+        docker-py in threads on hosts the asyncio client can't reach."""
+        env = kwargs_from_env()
+        try:
+            return AsyncDockerClient(
+                env.get("base_url"),
+                version=self.client.api._version,
+                tls=env.get("tls") or None,
+            )
+        except UnsupportedDockerHost:
+            return ThreadedDockerClient(self.client.api)
+
+    def _container_model(self, attrs: dict[str, Any]) -> Container:
+        """A container from the (sparse) attributes of the list endpoint.
+
+        Containers are inspected when needed, see `inspect`.
+        """
+        if "Name" not in attrs:
+            # Listed containers have every name, including those of links
+            # ("/other/alias"), instead of their own "Name".
+            names = attrs.get("Names") or ["/"]
+            attrs["Name"] = min(names, key=lambda name: name.count("/"))
+        return self.client.containers.prepare_model(attrs)
 
     def _load_containers(self):
-        containers = self.client.containers.list(all=self.config.show_all_containers)
-        self.containers = {container.name: container for container in containers}
+        # Sparse, i.e a single request instead of an inspect per container.
+        containers = [
+            self._container_model(attrs)
+            for attrs in self.client.api.containers(all=self.config.show_all_containers)
+        ]
+        self.containers.replace(
+            (container, self.status(container)) for container in containers
+        )
 
     def _load_images(self):
-        self.images = self.client.images.list(all=True)
+        self.images = [
+            self.client.images.prepare_model(attrs)
+            for attrs in self.client.api.images(all=True)
+        ]
 
-    @property
-    def attributes(self) -> Container:
-        return self.selected_container.attrs
+    def _restore(self, snapshot: Snapshot):
+        containers = [self._container_model(attrs) for attrs in snapshot.containers]
+        self.containers.replace(
+            (container, self.status(container)) for container in containers
+        )
+        self.images = [
+            self.client.images.prepare_model(attrs) for attrs in snapshot.images
+        ]
 
-    @property
-    def environment(self) -> dict:
-        return self.selected_container.attrs.get("Config").get("Env")
+    async def reconcile(self) -> list[ContainerEntry]:
+        """Update the containers and images restored from a snapshot to the
+        daemon's, keeping the entries of containers that still exist.
 
-    @property
-    def statistics(self) -> Image:
-        return self.selected_container.stats(stream=False)
+        Returns:
+            The entries of containers that no longer exist.
+        """
+        containers, images = await asyncio.gather(
+            self.api.get_json(
+                "/containers/json", {"all": self.config.show_all_containers}
+            ),
+            self.api.get_json("/images/json", {"all": True}),
+        )
+        removed = self.containers.sync(
+            (container, self.status(container))
+            for container in map(self._container_model, containers)
+        )
+        self.images = [self.client.images.prepare_model(attrs) for attrs in images]
+        entry = self.containers.get(self.selected_container.id)
+        if entry is not None:
+            self.selected_container = entry.container
+        self.restored = False
+        return removed
 
-    def append_container(self, container_name: str):
-        self.containers[container_name] = self.client.containers.get(container_name)
+    def snapshot(self) -> Snapshot:
+        return Snapshot(
+            api_version=self.api.version,
+            containers=[
+                {
+                    "Id": entry.id,
+                    "Name": f"/{entry.name}",
+                    "State": "running" if entry.status == "running" else "exited",
+                }
+                for entry in self.containers
+            ],
+            images=[
+                {"Id": image.id, "RepoTags": image.attrs.get("RepoTags")}
+                for image in self.images or []
+            ],
+            selected=self.selected_container.id,
+        )
 
-    def logs(self):
-        logs: bytes = self.selected_container.logs(
-            tail=self.config.log_tail, follow=False, stream=False
+    async def inspect(self, container_id: str) -> dict[str, Any]:
+        """The container's inspect data, cached until `invalidate_inspect`."""
+        attrs = self._inspected.get(container_id)
+        if attrs is None:
+            generation = self._inspect_generation
+            attrs = await self.api.get_json(f"/containers/{container_id}/json")
+            if generation == self._inspect_generation:
+                # Not invalidated while inspecting, i.e not already outdated.
+                self._inspected[container_id] = attrs
+        return attrs
+
+    def invalidate_inspect(self, container_id: str) -> None:
+        """Forget the inspect data of a container, e.g when an event changed it."""
+        self._inspect_generation += 1
+        self._inspected.pop(container_id, None)
+
+    async def attributes(self) -> dict[str, Any]:
+        return await self.inspect(self.selected_container.id)
+
+    async def environment(self) -> list[str]:
+        return (await self.attributes()).get("Config", {}).get("Env") or []
+
+    async def statistics(self) -> dict:
+        stats = self.stats_monitor.latest(self.selected_container.id)
+        if stats is not None:
+            return stats.raw
+        return await self.api.get_json(
+            f"/containers/{self.selected_container.id}/stats", {"stream": False}
         )
-        return logs.decode("utf-8").strip()
+
+    async def get_container(self, container_id: str) -> Container | None:
+        try:
+            attrs = await self.inspect(container_id)
+        except (DockerException, OSError):
+            return None
+        return self.client.containers.prepare_model(attrs)
+
+    async def container_action(self, container_id: str, action: str) -> None:
+        """Start, stop, restart or remove a container."""
+        if action == "remove":
+            await self.api.request("DELETE", f"/containers/{container_id}")
+        else:
+            await self.api.request("POST", f"/containers/{container_id}/{action}")
 
     def status(self, container: Container):
         status = "[U]"
@@ -99,24 +251,60 @@ class DockerManager:
 
         return status
 
-    def live_container_logs(self, logs: LogLines, stop_event: Event):
-        logs.clear()
+    async def events(self) -> AsyncIterator[dict[str, Any]]:
+        """Follow the daemon's container events."""
+        filters = json.dumps({"type": ["container"]})
+        async for event in self.api.stream_json("/events", {"filters": filters}):
+            yield event
 
-        try:
-            log_stream = self.selected_container.logs(
-                stream=True, follow=True, tail=self.config.log_tail
-            )
+    async def live_container_logs(
+        self,
+        container: Container,
+        ingest: LogIngest,
+        cursor: LogCursor,
+    ):
+        """Put the lines of the container's log stream until it ends or is cancelled.
 
-            for log in log_stream:
-                if stop_event.is_set():
-                    break
-                logs.write(log.decode("utf-8").rstrip())
+        The stream starts after the last line read by `cursor`, or with the last
+        `log_tail` lines if it read none. Errors, for example a lost connection,
+        are left to the task supervisor, which follows the logs again.
+        """
+        params = {"stdout": 1, "stderr": 1, "follow": 1, "timestamps": 1}
+        since = cursor.resume()
+        if since is None:
+            params["tail"] = self.config.log_tail
+        else:
+            params["tail"] = "all"
+            params["since"] = since
+        attrs = await self.inspect(container.id)
+        decoder = LogStreamDecoder(multiplexed=not attrs["Config"].get("Tty", False))
+        async for chunk in self.api.stream(f"/containers/{container.id}/logs", params):
+            ingest.put_many(cursor.strip(decoder.feed(chunk)))
+        ingest.put_many(cursor.strip(decoder.flush()))
+
+    async def container_log_data(
+        self, container: Container, tail: int
+    ) -> tuple[bytes, bool]:
+        """The raw stream of the container's last `tail` log lines, with docker's
+        timestamps, and whether it is multiplexed, to be decoded by the caller."""
+        params = {"stdout": 1, "stderr": 1, "timestamps": 1, "tail": tail}
+        attrs = await self.inspect(container.id)
+        data = await self.api.request("GET", f"/containers/{container.id}/logs", params)
+        return data, not attrs["Config"].get("Tty", False)
 
-        except Exception:
-            stop_event.set()  # Handle exceptions, for example, if the container is removed
+    async def container_stats_sample(self, container: Container) -> dict | None:
+        """A single stats sample, without waiting for the daemon's second sample."""
+        params = {"stream": False}
+        if not version_lt(self.api.version, "1.41"):
+            params["one-shot"] = True
+        try:
+            return await self.api.get_json(f"/containers/{container.id}/stats", params)
+        except (DockerException, OSError, asyncio.IncompleteReadError):
+            return None  # Handle exceptions, for example, if the container is removed
 
-        finally:
-            try:
-                log_stream.close()
-            except ValueError:
-                pass
+    async def live_container_stats(self, container: Container, stream: StatsStream):
+        """Put every sample of the container's stats stream until it ends or is cancelled."""
+        async for stats in self.api.stream_json(
+            f"/containers/{container.id}/stats", {"stream": True}
+        ):
+            stream.put(parse_stats(stats))
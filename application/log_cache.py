@@ -0,0 +1,120 @@
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+from docker.models.containers import Container
+
+from application.util.log_ingest import LogIngest
+from application.util.log_stream import LogCursor
+from application.util.ring_buffer import RingBuffer
+
+if TYPE_CHECKING:
+    from application.docker_manager import DockerManager
+    from application.task_supervisor import SupervisedTask
+    from application.widget.log_viewer import LogLine
+
+
+class LogSession(LogIngest):
+    """Logs of one container, followed in the background into a bounded buffer.
+
+    Lines written to the log viewer are kept in `lines`, so a session can be
+    swapped back into the viewer without asking the daemon for its logs again.
+    """
+
+    def __init__(
+        self, docker_manager: "DockerManager", container: Container, max_lines: int
+    ) -> None:
+        super().__init__(maxlen=max_lines)
+        self.docker_manager = docker_manager
+        self.container = container
+        self.lines: RingBuffer[LogLine] = RingBuffer(max_lines)
+        self.cursor = LogCursor()
+        self._task: SupervisedTask | None = None
+
+    @property
+    def following(self) -> bool:
+        return self._task is not None and self._task.active
+
+    @property
+    def ended(self) -> bool:
+        """Whether the logs stopped by themselves, i.e the container stopped."""
+        return self._task is not None and not self._task.active
+
+    @property
+    def size(self) -> int:
+        return len(self.lines) + len(self)
+
+    def follow(self) -> None:
+        """Start following, from where the session stopped if it was followed before."""
+        if self.following:
+            return
+        self._task = self.docker_manager.supervisor.spawn(
+            f"logs:{self.container.id}",
+            lambda: self.docker_manager.live_container_logs(
+                self.container, self, self.cursor
+            ),
+        )
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self.docker_manager.supervisor.cancel(self._task.name)
+            self._task = None
+
+
+class LogCache:
+    """Least recently used log sessions, one per container.
+
+    The `max_followed` most recently opened sessions keep following their
+    container's logs. Older sessions are stopped but keep their lines, and
+    resume from where they stopped when opened again, until the buffered lines
+    of all sessions exceed `max_lines`.
+    """
+
+    def __init__(
+        self,
+        docker_manager: "DockerManager",
+        max_followed: int,
+        max_lines: int,
+        session_lines: int,
+    ) -> None:
+        self.docker_manager = docker_manager
+        self.max_followed = max(max_followed, 1)
+        self.max_lines = max_lines
+        self.session_lines = session_lines
+        self._sessions: OrderedDict[str, LogSession] = OrderedDict()
+
+    def open(self, container: Container) -> LogSession:
+        """Get the following session of `container`, making it the most recent."""
+        session = self._sessions.get(container.id)
+        if session is None:
+            session = LogSession(self.docker_manager, container, self.session_lines)
+            self._sessions[container.id] = session
+        self._sessions.move_to_end(container.id)
+        session.follow()
+        self._evict()
+        return session
+
+    def container_started(self, container_id: str) -> None:
+        """Resume the logs of a session that was following the container when
+        it stopped, e.g when it restarted."""
+        session = self._sessions.get(container_id)
+        if session is not None and session.ended:
+            session.follow()
+
+    def discard(self, container_id: str) -> None:
+        """Stop and forget the session of a removed container."""
+        session = self._sessions.pop(container_id, None)
+        if session is not None:
+            session.stop()
+
+    def _evict(self) -> None:
+        sessions = list(reversed(self._sessions.values()))
+        for session in sessions[self.max_followed :]:
+            session.stop()
+
+        total = sum(session.size for session in sessions)
+        for session in reversed(sessions[1:]):
+            if total <= self.max_lines:
+                break
+            total -= session.size
+            session.stop()
+            del self._sessions[session.container.id]
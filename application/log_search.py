@@ -0,0 +1,117 @@
+import asyncio
+import os
+import sys
+from collections.abc import AsyncIterator
+from concurrent.futures import BrokenExecutor
+from contextlib import redirect_stderr
+from typing import TYPE_CHECKING, NamedTuple
+
+from docker.errors import DockerException
+from docker.models.containers import Container
+
+from application.util.log_search import LogHit, search_log_data
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+    from application.docker_manager import DockerManager
+
+
+class ContainerHits(NamedTuple):
+    """The result of searching one container's logs."""
+
+    name: str
+    count: int
+    """Number of matching lines, including those left out of `hits`."""
+    hits: list[LogHit]
+    """The latest matching lines, oldest first."""
+    error: str | None = None
+
+
+class LogSearch:
+    """Searches the logs of many containers at once.
+
+    At most `workers` logs are fetched from the daemon at a time, so searching
+    a large fleet doesn't open a connection per container. Decoding and
+    searching a log is left to a pool of processes, created on first use, so
+    neither the event loop nor the UI's threads wait for the regex engine.
+    Results are yielded per container, as soon as its log is searched.
+    """
+
+    MAX_HITS = 100
+    """Matching lines kept per container, the latest ones."""
+
+    def __init__(self, docker_manager: "DockerManager", workers: int) -> None:
+        self.docker_manager = docker_manager
+        self.workers = max(workers, 1)
+        self._pool: ProcessPoolExecutor | None = None
+
+    def _get_pool(self) -> "ProcessPoolExecutor":
+        if self._pool is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            # Forking a process running threads, i.e the UI's, can deadlock;
+            # processes are forked from a server process started beforehand.
+            methods = multiprocessing.get_all_start_methods()
+            method = "forkserver" if "forkserver" in methods else "spawn"
+            # The helper processes inherit stderr, which the UI has replaced by
+            # an object without a file descriptor.
+            with redirect_stderr(sys.__stderr__):
+                self._pool = ProcessPoolExecutor(
+                    max_workers=min(self.workers, os.cpu_count() or 1),
+                    mp_context=multiprocessing.get_context(method),
+                )
+        return self._pool
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def search(
+        self, containers: list[Container], keyword: str, flags: int, tail: int
+    ) -> AsyncIterator[ContainerHits]:
+        """Search the last `tail` lines of every container's log for `keyword`,
+        yielding the results in the order the searches finish."""
+        semaphore = asyncio.Semaphore(self.workers)
+
+        async def search_container(container: Container) -> ContainerHits:
+            pool = None
+            try:
+                async with semaphore:
+                    data, multiplexed = await self.docker_manager.container_log_data(
+                        container, tail
+                    )
+                pool = self._get_pool()
+                count, hits = await asyncio.get_running_loop().run_in_executor(
+                    pool,
+                    search_log_data,
+                    data,
+                    multiplexed,
+                    keyword,
+                    flags,
+                    self.MAX_HITS,
+                )
+            except BrokenExecutor as error:
+                # A process of the pool died, e.g killed: the pool is unusable,
+                # the next search starts a new one.
+                if pool is self._pool:
+                    self.shutdown()
+                return ContainerHits(container.name, 0, [], str(error) or "failed")
+            except (
+                DockerException,
+                OSError,
+                asyncio.IncompleteReadError,
+                RuntimeError,  # E.g the pool was shut down meanwhile.
+            ) as error:
+                return ContainerHits(container.name, 0, [], str(error) or "failed")
+            return ContainerHits(container.name, count, hits)
+
+        tasks = [asyncio.ensure_future(search_container(c)) for c in containers]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
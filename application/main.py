@@ -1,19 +1,18 @@
 import asyncio
+import gc
 import logging
 import subprocess
-from threading import Thread
 
 import click
 import yaml
-from colorama import Fore, Style
-from docker.models.containers import Container
-from packaging.version import parse
+from docker.errors import DockerException
 from textual import on, work
 from textual.app import App, ComposeResult
 from textual.binding import Binding
 from textual.containers import Vertical
 from textual.events import DescendantFocus
 from textual.logging import TextualHandler
+from textual.screen import ModalScreen
 from textual.widgets import (
     Button,
     Footer,
@@ -21,8 +20,8 @@ from textual.widgets import (
     ListView,
     TabbedContent,
 )
-from yaspin import yaspin
 
+from application.async_docker import AsyncDockerError
 from application.docker_manager import (
     DockerManager,
     FailedDockerClient,
@@ -31,6 +30,7 @@ from application.docker_manager import (
 from application.messages import ClickedContainer, ContainersAndImagesExpaned
 from application.util.config import CONFIG_PATH, load_config
 from application.util.helper import (
+    LATEST_VERSION_TTL,
     get_current_version,
     get_latest_version,
     read_changelog,
@@ -39,17 +39,27 @@ from application.util.helper import (
     update_changelog,
     write_latest_version_fetch,
 )
-from application.widget.containers import PockerContainers
+from application.util.snapshot import read_snapshot, write_snapshot
+from application.widget.containers import ContainerList, PockerContainers
 from application.widget.content import ContentWindow
-from application.widget.help import HelpScreen
 from application.widget.images import PockerImages
 from application.widget.log_viewer import LogLines
-from application.widget.settings import SettingsScreen
 from application.widget.shell import ShellPane
-from application.widget.startup_error_modal import StartupError
-from application.widget.terminal import Terminal
 from application.widget.topbar import TopBar
 
+
+def _help_screen():
+    from application.widget.help import HelpScreen
+
+    return HelpScreen()
+
+
+def _settings_screen():
+    from application.widget.settings import SettingsScreen
+
+    return SettingsScreen()
+
+
 #### REFERENCES ####
 logs: LogLines
 
@@ -61,7 +71,8 @@ logging.basicConfig(
 
 class UI(App):
     CSS_PATH = "styles.tcss"
-    SCREENS = {"helpscreen": HelpScreen, "settingsscreen": SettingsScreen}
+    # Screens and rarely used tabs import their dependencies when first shown.
+    SCREENS = {"helpscreen": _help_screen, "settingsscreen": _settings_screen}
     TITLE = "Pocker"
     BINDINGS = [
         Binding(
@@ -76,7 +87,6 @@ class UI(App):
         Binding(key="/", action="toggle_search_log", description="Search"),
         Binding(key="escape", action="dismiss_search_log"),
     ]
-    current_index = 0
     _ERROR = None
     _containers_and_images_maximized = False
     _content_window_maximized = False
@@ -105,6 +115,11 @@ class UI(App):
             "shell",
             description="Shell",
         )
+        self.set_keybind(
+            keymap.get("overview"),
+            "overview",
+            description="Overview",
+        )
         self.set_keybind(
             keymap.get("fullscreen"),
             "toggle_content_full_screen",
@@ -125,6 +140,21 @@ class UI(App):
             "toggle_auto_scroll",
             description="Auto scroll",
         )
+        self.set_keybind(
+            keymap.get("structured-logs"),
+            "toggle_structured_logs",
+            description="Structured",
+        )
+        self.set_keybind(
+            keymap.get("grep-logs"),
+            "toggle_grep_logs",
+            description="Grep",
+        )
+        self.set_keybind(
+            keymap.get("search-all-logs"),
+            "search_all_logs",
+            description="Search all",
+        )
 
     def set_keybind(self, key: str, action: str, description: str):
         try:
@@ -137,7 +167,9 @@ class UI(App):
         self.config = load_config()
 
         try:
-            self.docker_manager: DockerManager = DockerManager(self.config)
+            self.docker_manager: DockerManager = DockerManager(
+                self.config, snapshot=read_snapshot()
+            )
         except (NoVisibleContainers, FailedDockerClient) as ex:
             self._ERROR = ex
             return
@@ -160,16 +192,52 @@ class UI(App):
 
     async def on_mount(self) -> None:
         if self._ERROR:
-            self.app.push_screen(StartupError(self._ERROR))
+            self._show_startup_error(self._ERROR)
             return
         self.read_and_apply_config()
         self._run_threads()
         self.set_header_statuses()
-        self._look_for_update()
-        self.list_view = self.query_one(PockerContainers).query_one(
-            "#ContainersAndImagesListView"
+        self.docker_manager.supervisor.spawn(
+            "update-check", self._look_for_update, restart="never"
         )
+        if self.docker_manager.restored:
+            self.docker_manager.supervisor.spawn(
+                "reconcile", self._reconcile, restart="never"
+            )
+        self.container_list = self.query_one(ContainerList)
         self.currently_focused_widget = self.focused
+        # The objects created at startup live as long as the app; keep the garbage
+        # collector from walking them on every full collection, which otherwise
+        # stalls the UI while logs flood in.
+        self.call_after_refresh(gc.freeze)
+
+    def on_unmount(self) -> None:
+        if self._ERROR:
+            return
+        self.docker_manager.supervisor.shutdown()
+        self.docker_manager.log_search.shutdown()
+        if not self.docker_manager.restored:
+            # Otherwise the snapshot is unchanged, or the daemon didn't answer.
+            write_snapshot(self.docker_manager.snapshot())
+
+    def _show_startup_error(self, error: Exception):
+        from application.widget.startup_error_modal import StartupError
+
+        self.app.push_screen(StartupError(error))
+
+    async def _reconcile(self):
+        """Replace the containers and images painted from the last session's
+        snapshot with the daemon's."""
+        try:
+            removed = await self.docker_manager.reconcile()
+        except (DockerException, OSError) as error:
+            self._show_startup_error(FailedDockerClient(str(error)))
+            return
+        if not self.docker_manager.containers:
+            self._show_startup_error(NoVisibleContainers())
+            return
+        self.query_one(PockerContainers).containers_reconciled(removed)
+        self.query_one(PockerImages).refresh_images()
 
     @on(DescendantFocus)
     def focus_switched(self, focus: DescendantFocus):
@@ -183,7 +251,7 @@ class UI(App):
         except AttributeError:
             pass  # Previous widget might not have a border.
 
-        if type(widget) is ListView:
+        if type(widget) in (ListView, ContainerList):
             next_focused_widget = widget.parent
             widget.parent.add_class("active-widget")
         elif "ContentTabs" in str(type(widget)):
@@ -199,6 +267,10 @@ class UI(App):
     def read_and_apply_config(self):
         logs = self.query_one("#logs", LogLines)
         logs.max_lines = self.config.max_log_lines
+        logs.flood_guard.threshold = self.config.log_flood_threshold
+        logs.flood_guard.sampling = self.config.log_flood_sampling
+        logs.structured_columns = tuple(self.config.structured_columns)
+        logs.grep_context = self.config.grep_context
 
         if self.config.start_fullscreen:
             self.action_toggle_content_full_screen()
@@ -207,23 +279,31 @@ class UI(App):
         if not self.config.start_scroll:
             self.action_toggle_auto_scroll()
 
-    @work(exclusive=True)
     async def _look_for_update(self):
+        """Show whether a newer version is available, looking it up at most every
+        `LATEST_VERSION_TTL` minutes. Files and network are only accessed from a
+        thread, so a slow or missing network doesn't hold up the UI."""
+        from packaging.version import parse
+
         fetched_version = get_current_version()  # can return None
         if not fetched_version:
             return
         current_version = parse(fetched_version)
-        last_fetch = parse(read_latest_version_fetch().version_fetched)
-
-        if last_fetch > current_version:
-            self.set_header_new_version_available(last_fetch)
-            # Fetch latest version if more than 20 minutes ago.
-            if time_since_last_fetch() > 20:
-                latest_version = get_latest_version()
-                if latest_version is not None:
-                    if latest_version > current_version:
-                        self._show_update_notification(current_version, latest_version)
-                    write_latest_version_fetch(latest_version.base_version)
+
+        last_fetch = await asyncio.to_thread(read_latest_version_fetch)
+        if last_fetch is not None:
+            if parse(last_fetch.version_fetched) > current_version:
+                self.set_header_new_version_available(last_fetch.version_fetched)
+            if time_since_last_fetch(last_fetch) < LATEST_VERSION_TTL:
+                return
+
+        latest_version = await asyncio.to_thread(get_latest_version)
+        if latest_version is None:
+            return
+        await asyncio.to_thread(write_latest_version_fetch, latest_version.base_version)
+        if latest_version > current_version:
+            self.set_header_new_version_available(latest_version)
+            self._show_update_notification(current_version, latest_version)
 
     def _show_update_notification(self, current_version, latest_version):
         self.notify(
@@ -242,19 +322,15 @@ class UI(App):
 
     def _run_threads(self):
         self.content_window.run_log_task()
-        loop = asyncio.get_event_loop()
 
-        Thread(target=self.content_window.live_statistics_task, daemon=True).start()
-        Thread(
-            target=self.query_one(PockerContainers).live_status_events_task,
-            args=(loop,),
-            daemon=True,
-        ).start()
+        self.content_window.live_statistics_task()
+        self.query_one(PockerContainers).live_status_events_task()
 
     def set_header_statuses(self):
         logs = self.query_one("#logs", LogLines)
         self.query_one("#topbar_statuses").update(
             f"Wrap [{logs.wrap}]    Scroll [{logs.auto_scroll}]"
+            f"    Structured [{logs.structured}]    Grep [{logs.grep}]"
         )
 
     def set_header_new_version_available(self, new_version):
@@ -270,32 +346,19 @@ class UI(App):
         except Exception:
             pass
 
-    def set_list_item_background(self, old_index: int, new_index: int):
-        logs = self.query_one("#logs", LogLines)
-
-        old_item = self.list_view.children[old_index]
-        new_item = self.list_view.children[new_index]
-
-        old_item.classes -= {"selected"}
-        new_item.classes |= {"selected"}
-
-        self.current_index = new_index
-        self.docker_manager.selected_container = self.docker_manager.containers.get(
-            str(new_item.children[0].renderable)
-        )
-        logs.border_title = self.docker_manager.selected_container.name
-
     @on(ClickedContainer)
     def _on_container_clicked(self, event: ClickedContainer):
         """Container ListView clicked in containers list."""
-        if (
-            type(self.app.screen) is SettingsScreen
-            or type(self.app.screen) is HelpScreen
-        ):
-            return
+        if isinstance(self.app.screen, ModalScreen):
+            return  # Help or settings
 
-        self.content_window.query_one("#logs").border_title = event.clicked_container.id
+        self._show_container(event.clicked_container)
+
+    def _show_container(self, name: str):
+        """Show the logs and stats of the selected container, named `name`."""
+        self.content_window.query_one("#logs").border_title = name
         self.content_window.run_log_task()
+        self.content_window.live_statistics_task()
         if self.content_window.query_one(TabbedContent).active != "logpane":
             # Prevent duplicated logs appearing.
             self._update_current_tab()
@@ -325,23 +388,35 @@ class UI(App):
                 self.action_statistics()
             case "shellpane":
                 self.action_shell()
+            case "overviewpane":
+                self.action_overview()
 
     def action_restore_logs(self):
         self.query_one(TabbedContent).active = "logpane"
 
     def action_attributes(self):
         self.query_one(TabbedContent).active = "attributespane"
+        self._write_attributes_log()
+
+    @work(exclusive=True, group="inspect", exit_on_error=False)
+    async def _write_attributes_log(self):
         attributes_log: LogLines = self.query_one("#attributes_log")
         attributes_log.border_title = self.docker_manager.selected_container.name
+        attributes = await self.docker_manager.attributes()
         attributes_log.clear()
-        attributes_log.write(yaml.dump(self.docker_manager.attributes, indent=2))
+        attributes_log.write(yaml.dump(attributes, indent=2))
 
     def action_environment(self):
         self.query_one(TabbedContent).active = "environmentpane"
+        self._write_environment_log()
+
+    @work(exclusive=True, group="inspect", exit_on_error=False)
+    async def _write_environment_log(self):
         environment_log: LogLines = self.query_one("#environment_log")
-        environment_log.clear()
         environment_log.border_title = self.docker_manager.selected_container.name
-        for entry in self.docker_manager.environment:
+        environment = await self.docker_manager.environment()
+        environment_log.clear()
+        for entry in environment:
             name_value = entry.split("=", maxsplit=2)
             key = name_value[0]
             if len(name_value) == 2:
@@ -352,23 +427,29 @@ class UI(App):
 
     def action_statistics(self):
         self.query_one(TabbedContent).active = "statisticspane"
+        self.content_window.show_statistics_plots()
         self._write_statistics_log()
 
-    def _write_statistics_log(self):
+    @work(exclusive=True, group="statistics", exit_on_error=False)
+    async def _write_statistics_log(self):
         statistics_log: LogLines = self.query_one("#statistics_log")
-        statistics_log.clear()
         statistics_log.border_title = self.docker_manager.selected_container.name
-        statistics_log.write(yaml.dump(self.docker_manager.statistics, indent=2))
+        statistics = await self.docker_manager.statistics()
+        statistics_log.clear()
+        statistics_log.write(yaml.dump(statistics, indent=2))
 
     def action_shell(self):
-        shell: Terminal = self.query_one("#shell-output")
         shell_wrapper: ShellPane = self.query_one(ShellPane)
 
         self.query_one(TabbedContent).active = "shellpane"
 
-        shell_wrapper.initialize()
+        shell = shell_wrapper.initialize()
         shell.focus()
 
+    def action_overview(self):
+        self.query_one(TabbedContent).active = "overviewpane"
+        self.content_window.show_overview().focus()
+
     def action_wrap_text(self):
         logs = self.query_one("#logs", LogLines)
 
@@ -377,8 +458,6 @@ class UI(App):
         else:
             logs.wrap = True
         self.set_header_statuses()
-        logs.clear()
-        logs.write(self.docker_manager.logs())
 
     def action_toggle_content_full_screen(self):
         tabbed_content = self.query_one(TabbedContent)
@@ -417,8 +496,7 @@ class UI(App):
             containers_and_images.styles.width = "100%"
             self._containers_and_images_maximized = True
 
-            for child in self.list_view.children:
-                child.add_class("expanded-container")
+            self.query_one("#container-actions").add_class("expanded-container")
 
             self.query_one(PockerContainers)._containers_and_images_maximized = True
             self.post_message(ContainersAndImagesExpaned())
@@ -428,38 +506,47 @@ class UI(App):
             containers_and_images.styles.width = "20%"
             self._containers_and_images_maximized = False
             self.query_one(PockerContainers)._containers_and_images_maximized = False
-            for child in self.list_view.children:
-                child.remove_class("expanded-container")
+            self.query_one("#container-actions").remove_class("expanded-container")
         self.set_header_statuses()
 
-    def on_button_pressed(self, event: Button.Pressed) -> None:
+    async def on_button_pressed(self, event: Button.Pressed) -> None:
         btn_id = event.button.id
 
         if "container-btn" not in btn_id:
             return
 
-        container_name = str(event.button.parent.children[0].renderable)
-        container: Container = self.docker_manager.client.containers.get(container_name)
-
-        match btn_id:
-            case "start-container-btn":
-                if container.status != "running":
-                    container.start()
-            case "stop-container-btn":
-                if container.status != "exited":
-                    container.stop()
-            case "restart-container-btn":
-                container.restart()
-            case "remove-container-btn":
-                if container.status == "running":
-                    self.notify(
-                        title=f"{container_name} is still running.",
-                        message="Container can't be removed until it's exited.",
-                        timeout=6,
-                        severity="warning",
-                    )
-                    return
-                container.remove()
+        container_name = self.container_list.selected_name
+        entry = self.docker_manager.containers.get(container_name or "")
+        if entry is None:
+            return
+
+        try:
+            match btn_id:
+                case "start-container-btn":
+                    if entry.status != "running":
+                        await self.docker_manager.container_action(entry.id, "start")
+                case "stop-container-btn":
+                    if entry.status != "down":
+                        await self.docker_manager.container_action(entry.id, "stop")
+                case "restart-container-btn":
+                    await self.docker_manager.container_action(entry.id, "restart")
+                case "remove-container-btn":
+                    if entry.status == "running":
+                        self.notify(
+                            title=f"{container_name} is still running.",
+                            message="Container can't be removed until it's exited.",
+                            timeout=6,
+                            severity="warning",
+                        )
+                        return
+                    await self.docker_manager.container_action(entry.id, "remove")
+        except AsyncDockerError as error:
+            self.notify(
+                title=f"Failed to update {container_name}.",
+                message=error.message,
+                timeout=6,
+                severity="error",
+            )
 
     def action_toggle_auto_scroll(self):
         logs = self.query_one("#logs", LogLines)
@@ -470,6 +557,40 @@ class UI(App):
             logs.auto_scroll = True
         self.set_header_statuses()
 
+    def action_toggle_structured_logs(self):
+        logs = self.query_one("#logs", LogLines)
+        logs.structured = not logs.structured
+        self.set_header_statuses()
+
+    def action_toggle_grep_logs(self):
+        logs = self.query_one("#logs", LogLines)
+        logs.grep = not logs.grep
+        self.set_header_statuses()
+
+    def action_search_all_logs(self):
+        from application.widget.log_search import LogSearchScreen
+
+        self.push_screen(
+            LogSearchScreen(self.docker_manager), self._open_log_search_result
+        )
+
+    def _open_log_search_result(self, result) -> None:
+        """Open the container of a line found by searching every log, at that line."""
+        if result is None:
+            return
+        entry = self.docker_manager.containers.get(result.container)
+        if entry is None:
+            return  # Removed in the meantime
+        self.container_list.select(entry.name)
+        self.docker_manager.selected_container = entry.container
+        self.action_restore_logs()
+        self._show_container(entry.name)
+        if self.query_one(".container").styles.display != "block":
+            self.action_toggle_search_log()
+        self.content_window.search_for_line(
+            result.keyword, result.case_sensitive, result.hit.text
+        )
+
     def action_toggle_search_log(self):
         search_logs_input = self.query_one("#search_log_input")
         search_container = self.query_one(".container")
@@ -502,6 +623,8 @@ class UI(App):
         log_lines = self.content_window.query_one("#logs", LogLines)
         log_lines.keyword = None
         log_lines.current_index = None
+        log_lines.search_index.clear()
+        log_lines.refresh_grep_view()
 
 
 def start():
@@ -518,6 +641,10 @@ def cli(ctx):
 @cli.command()
 @click.option("--force", "-f", is_flag=True, help="Force update.")
 def update(force):
+    from colorama import Fore, Style
+    from packaging.version import parse
+    from yaspin import yaspin
+
     try:
         if time_since_last_fetch() < 5 and not force:
             print(
@@ -528,6 +655,9 @@ def update(force):
 
         current_version = parse(get_current_version())
         latest_version = get_latest_version()
+        if latest_version is None:
+            print("Could not look up the latest version, try again later.")
+            return
         write_latest_version_fetch(latest_version.base_version)
 
         if latest_version > current_version:
@@ -1,7 +1,6 @@
 from dataclasses import dataclass
 
 from textual.message import Message
-from textual.widgets import ListItem
 
 
 @dataclass
@@ -11,4 +10,5 @@ class ContainersAndImagesExpaned(Message, bubble=True):
 
 @dataclass
 class ClickedContainer(Message, bubble=True):
-    clicked_container: ListItem
+    clicked_container: str
+    """Name of the clicked container."""
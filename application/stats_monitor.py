@@ -0,0 +1,177 @@
+import asyncio
+import time
+from collections import deque
+from typing import TYPE_CHECKING
+
+from docker.models.containers import Container
+
+from application.util.container_stats import ContainerStats, parse_stats
+
+if TYPE_CHECKING:
+    from application.docker_manager import DockerManager
+    from application.task_supervisor import SupervisedTask
+
+
+class StatsStream:
+    """Streamed stats of one container, keeping only the latest sample.
+
+    The daemon pushes a sample about every second over a single connection,
+    instead of taking a new (blocking) sample for every request.
+    """
+
+    def __init__(self, docker_manager: "DockerManager", container: Container) -> None:
+        self.docker_manager = docker_manager
+        self.container = container
+        self.latest: ContainerStats | None = None
+        self.watchers = 0
+        self._task: SupervisedTask | None = None
+
+    @property
+    def streaming(self) -> bool:
+        return self._task is not None and self._task.active
+
+    def start(self) -> None:
+        if self.streaming:
+            return
+        self._task = self.docker_manager.supervisor.spawn(
+            f"stats:{self.container.id}",
+            lambda: self.docker_manager.live_container_stats(self.container, self),
+        )
+
+    def stop(self) -> None:
+        if self.streaming:
+            self.docker_manager.supervisor.cancel(self._task.name)
+
+    def put(self, stats: ContainerStats) -> None:
+        self.latest = stats
+
+
+class StatsMonitor:
+    """Stats streams of the watched containers, one connection per container.
+
+    A container is streamed while at least one view watches it.
+    """
+
+    def __init__(self, docker_manager: "DockerManager") -> None:
+        self.docker_manager = docker_manager
+        self._streams: dict[str, StatsStream] = {}
+
+    def watch(self, container: Container) -> StatsStream:
+        stream = self._streams.get(container.id)
+        if stream is None:
+            stream = StatsStream(self.docker_manager, container)
+            self._streams[container.id] = stream
+        stream.watchers += 1
+        stream.start()
+        return stream
+
+    def unwatch(self, container_id: str) -> None:
+        stream = self._streams.get(container_id)
+        if stream is None:
+            return
+        stream.watchers -= 1
+        if stream.watchers <= 0:
+            stream.stop()
+            del self._streams[container_id]
+
+    def latest(self, container_id: str) -> ContainerStats | None:
+        stream = self._streams.get(container_id)
+        return stream.latest if stream is not None else None
+
+    def discard(self, container_id: str) -> None:
+        """Stop streaming a removed container."""
+        stream = self._streams.pop(container_id, None)
+        if stream is not None:
+            stream.stop()
+
+
+class FleetSampler:
+    """Round-robin stats of many containers, sampled by a fixed number of tasks.
+
+    Streaming the stats of every container takes a connection per container.
+    Instead, `workers` tasks take turns sampling the container sampled the
+    longest ago, at most once per `interval` seconds each, so at most
+    `workers` requests are made at a time. CPU usage is computed against the
+    container's previous sample.
+    """
+
+    def __init__(
+        self, docker_manager: "DockerManager", workers: int, interval: float = 2.0
+    ) -> None:
+        self.docker_manager = docker_manager
+        self.workers = max(workers, 1)
+        self.interval = interval
+        self.samples: dict[str, ContainerStats] = {}
+        self._queue: deque[tuple[float, Container]] = deque()
+        self._ids: set[str] = set()
+        self._changed = asyncio.Event()
+        self._running = False
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def start(self, containers: list[Container]) -> None:
+        self.set_containers(containers)
+        if self.running:
+            return
+        self._running = True
+        for worker in range(self.workers):
+            self.docker_manager.supervisor.spawn(f"fleet:{worker}", self._sample)
+
+    def stop(self) -> None:
+        self._running = False
+        self.docker_manager.supervisor.cancel_prefix("fleet:")
+
+    def set_containers(self, containers: list[Container]) -> None:
+        """Sample `containers` from now on, keeping the samples of known ones."""
+        ids = {container.id for container in containers}
+        self._queue = deque(
+            (due, container) for due, container in self._queue if container.id in ids
+        )
+        self._queue.extend(
+            (0.0, container)
+            for container in containers
+            if container.id not in self._ids
+        )
+        self._ids = ids
+        for container_id in self.samples.keys() - ids:
+            del self.samples[container_id]
+        self._changed.set()
+
+    async def _wait(self, timeout: float | None = None) -> None:
+        """Wait until the containers change, or `timeout` seconds."""
+        self._changed.clear()
+        # Not wait_for: its timeout error is only the built-in one from 3.11 on.
+        changed = asyncio.ensure_future(self._changed.wait())
+        try:
+            await asyncio.wait((changed,), timeout=timeout)
+        finally:
+            changed.cancel()
+
+    async def _next(self) -> Container:
+        while True:
+            if not self._queue:
+                await self._wait()
+                continue
+            due, container = self._queue[0]
+            delay = due - time.monotonic()
+            if delay > 0:
+                await self._wait(delay)
+                continue
+            self._queue.popleft()
+            return container
+
+    async def _sample(self) -> None:
+        while True:
+            container = await self._next()
+            previous = self.samples.get(container.id)
+            stats = await self.docker_manager.container_stats_sample(container)
+            if container.id not in self._ids:
+                continue  # Removed while being sampled.
+            if stats is not None:
+                self.samples[container.id] = parse_stats(
+                    stats, previous.raw if previous is not None else None
+                )
+            self._queue.append((time.monotonic() + self.interval, container))
+            self._changed.set()
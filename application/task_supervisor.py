@@ -0,0 +1,166 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from typing import NamedTuple
+
+from application.async_docker import is_transient_error
+
+log = logging.getLogger(__name__)
+
+TaskFactory = Callable[[], Awaitable[None]]
+
+STARTING = "starting"
+RUNNING = "running"
+BACKOFF = "backoff"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class TaskStatus(NamedTuple):
+    name: str
+    state: str
+    restarts: int
+    error: str | None
+    changed_at: float
+
+
+class SupervisedTask:
+    """A named background task, (re)started from `factory` by the supervisor.
+
+    `restart` is one of:
+    - "never": run once.
+    - "on-failure": run again after a transient error, e.g the daemon restarted.
+    - "always": also run again when the task returns, e.g a closed events stream.
+    """
+
+    __slots__ = (
+        "_task",
+        "changed_at",
+        "error",
+        "factory",
+        "name",
+        "restart",
+        "restarts",
+        "state",
+    )
+
+    def __init__(self, name: str, factory: TaskFactory, restart: str) -> None:
+        self.name = name
+        self.factory = factory
+        self.restart = restart
+        self.restarts = 0
+        self.error: str | None = None
+        self.state = STARTING
+        self.changed_at = time.time()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def active(self) -> bool:
+        """Running, or waiting to be restarted."""
+        return self._task is not None and not self._task.done()
+
+    def status(self) -> TaskStatus:
+        return TaskStatus(
+            self.name, self.state, self.restarts, self.error, self.changed_at
+        )
+
+    def _set_state(self, state: str, error: BaseException | None = None) -> None:
+        self.state = state
+        self.changed_at = time.time()
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+
+
+class TaskSupervisor:
+    """Owns the background tasks of the app, one per name.
+
+    Spawning a name that is already taken cancels the previous task first, so
+    a stream is never followed twice. Tasks failing with a transient error are
+    restarted with an exponential backoff, starting at `min_backoff` seconds
+    and capped at `max_backoff`. The backoff is reset once a run lasted
+    `STABLE_AFTER` seconds.
+
+    The last `MAX_FAILURES` failures are kept in `failures`, as cancelled or
+    re-spawned tasks leave `status()`.
+    """
+
+    STABLE_AFTER = 30.0
+    MAX_FAILURES = 20
+
+    def __init__(self, min_backoff: float = 0.5, max_backoff: float = 30.0) -> None:
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self._tasks: dict[str, SupervisedTask] = {}
+        self.failures: deque[TaskStatus] = deque(maxlen=self.MAX_FAILURES)
+
+    def __contains__(self, name: str) -> bool:
+        task = self._tasks.get(name)
+        return task is not None and task.active
+
+    def get(self, name: str) -> SupervisedTask | None:
+        return self._tasks.get(name)
+
+    def spawn(
+        self, name: str, factory: TaskFactory, restart: str = "on-failure"
+    ) -> SupervisedTask:
+        self.cancel(name)
+        task = self._tasks[name] = SupervisedTask(name, factory, restart)
+        task._task = asyncio.get_running_loop().create_task(
+            self._supervise(task), name=name
+        )
+        return task
+
+    def cancel(self, name: str) -> None:
+        task = self._tasks.pop(name, None)
+        if task is not None and task.active:
+            task._set_state(CANCELLED)
+            task._task.cancel()
+
+    def cancel_prefix(self, prefix: str) -> None:
+        """Cancel every task whose name starts with `prefix`, e.g "logs:"."""
+        for name in [name for name in self._tasks if name.startswith(prefix)]:
+            self.cancel(name)
+
+    def shutdown(self) -> None:
+        for name in list(self._tasks):
+            self.cancel(name)
+
+    def status(self) -> list[TaskStatus]:
+        return [task.status() for task in self._tasks.values()]
+
+    async def _supervise(self, task: SupervisedTask) -> None:
+        failures = 0
+        while True:
+            started = time.monotonic()
+            task._set_state(RUNNING)
+            try:
+                await task.factory()
+            except asyncio.CancelledError:
+                raise
+            # Any failure is recorded in the task's status, then the restart
+            # policy decides whether the task runs again.
+            except Exception as error:  # noqa: BLE001
+                if task.restart == "never" or not is_transient_error(error):
+                    log.warning("Task %s failed: %r", task.name, error)
+                    task._set_state(FAILED, error)
+                    self.failures.append(task.status())
+                    return
+                log.debug("Task %s failed: %r", task.name, error)
+                task._set_state(BACKOFF, error)
+                self.failures.append(task.status())
+            else:
+                if task.restart != "always":
+                    task._set_state(DONE)
+                    return
+                task._set_state(BACKOFF)
+
+            if time.monotonic() - started >= self.STABLE_AFTER:
+                failures = 0
+            delay = min(self.max_backoff, self.min_backoff * 2**failures)
+            failures += 1
+            log.info("Restarting task %s in %.1fs", task.name, delay)
+            await asyncio.sleep(delay)
+            task.restarts += 1
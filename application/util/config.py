@@ -9,6 +9,14 @@ CONFIG_PATH = POCKER_CONFIG_BASE_PATH / "config.yaml"
 class Config(BaseModel):
     log_tail: int = 2000
     max_log_lines: int = 2000
+    log_cache_size: int = 5
+    log_cache_lines: int = 20000
+    fleet_stats_workers: int = 8
+    log_search_workers: int = 8
+    log_flood_threshold: int = 2000
+    log_flood_sampling: bool = False
+    structured_columns: list[str] = ["ts", "level", "logger", "msg"]
+    grep_context: int = 2
     start_wrap: bool = False
     show_all_containers: bool = False
     start_fullscreen: bool = False
@@ -20,10 +28,14 @@ class Config(BaseModel):
         "environment": "e",
         "statistics": "d",
         "shell": "v",
+        "overview": "o",
         "fullscreen": "f",
         "fullscreen-ci": "n",
         "wrap-logs": "w",
         "toggle-scroll": "s",
+        "structured-logs": "t",
+        "grep-logs": "g",
+        "search-all-logs": "G",
     }
 
     def __repr__(self) -> str:
@@ -33,6 +45,14 @@ class Config(BaseModel):
         default_config = {
             "log_tail": self.log_tail,
             "max_log_lines": self.max_log_lines,
+            "log_cache_size": self.log_cache_size,
+            "log_cache_lines": self.log_cache_lines,
+            "fleet_stats_workers": self.fleet_stats_workers,
+            "log_search_workers": self.log_search_workers,
+            "log_flood_threshold": self.log_flood_threshold,
+            "log_flood_sampling": self.log_flood_sampling,
+            "structured_columns": self.structured_columns,
+            "grep_context": self.grep_context,
             "start_wrap": self.start_wrap,
             "show_all_containers": self.show_all_containers,
             "start_fullscreen": self.start_fullscreen,
@@ -0,0 +1,106 @@
+from typing import Any, NamedTuple
+
+MEGABYTE = 1024 * 1024
+
+
+class ContainerStats(NamedTuple):
+    """One sample of the docker stats stream, in the units `docker stats` shows."""
+
+    read: str
+    cpu_percent: float
+    memory_usage: int
+    memory_limit: int
+    net_rx: int
+    net_tx: int
+    block_read: int
+    block_write: int
+    pids: int
+    raw: dict[str, Any]
+
+    @property
+    def memory_mb(self) -> float:
+        return self.memory_usage / MEGABYTE
+
+    @property
+    def memory_percent(self) -> float:
+        if not self.memory_limit:
+            return 0.0
+        return self.memory_usage / self.memory_limit * 100
+
+
+def cpu_percent(stats: dict[str, Any]) -> float:
+    """CPU usage since the previous sample, 100% being one fully used CPU.
+
+    Usage counters are cumulative, so the usage is the container's share of
+    the system's CPU time between `precpu_stats` and `cpu_stats`. The first
+    sample of a stream has no previous one and reports 0.
+    """
+    cpu = stats.get("cpu_stats") or {}
+    precpu = stats.get("precpu_stats") or {}
+    cpu_delta = cpu.get("cpu_usage", {}).get("total_usage", 0) - precpu.get(
+        "cpu_usage", {}
+    ).get("total_usage", 0)
+    system_delta = cpu.get("system_cpu_usage", 0) - precpu.get("system_cpu_usage", 0)
+    if cpu_delta <= 0 or system_delta <= 0:
+        return 0.0
+
+    online_cpus = cpu.get("online_cpus") or len(
+        cpu.get("cpu_usage", {}).get("percpu_usage") or ()
+    )
+    return cpu_delta / system_delta * (online_cpus or 1) * 100
+
+
+def memory_usage(stats: dict[str, Any]) -> int:
+    """Memory used, without the page cache, like `docker stats`."""
+    memory = stats.get("memory_stats") or {}
+    usage = memory.get("usage", 0)
+    details = memory.get("stats") or {}
+    if "inactive_file" in details:  # cgroup v2
+        return max(usage - details["inactive_file"], 0)
+    if "total_inactive_file" in details:  # cgroup v1
+        return max(usage - details["total_inactive_file"], 0)
+    return max(usage - details.get("cache", 0), 0)
+
+
+def parse_stats(
+    stats: dict[str, Any], previous: dict[str, Any] | None = None
+) -> ContainerStats:
+    """Parse a stats payload.
+
+    Args:
+        stats: The payload, as sent by the daemon.
+        previous: An earlier payload of the same container, used instead of
+            `precpu_stats` for the CPU usage, i.e for one-shot samples.
+    """
+    if previous is not None:
+        stats = {**stats, "precpu_stats": previous.get("cpu_stats") or {}}
+    networks = (stats.get("networks") or {}).values()
+    block_read = block_write = 0
+    io = stats.get("blkio_stats") or {}
+    for entry in io.get("io_service_bytes_recursive") or ():
+        operation = entry.get("op", "").lower()
+        if operation == "read":
+            block_read += entry.get("value", 0)
+        elif operation == "write":
+            block_write += entry.get("value", 0)
+
+    return ContainerStats(
+        read=stats.get("read", ""),
+        cpu_percent=cpu_percent(stats),
+        memory_usage=memory_usage(stats),
+        memory_limit=(stats.get("memory_stats") or {}).get("limit", 0),
+        net_rx=sum(network.get("rx_bytes", 0) for network in networks),
+        net_tx=sum(network.get("tx_bytes", 0) for network in networks),
+        block_read=block_read,
+        block_write=block_write,
+        pids=(stats.get("pids_stats") or {}).get("current", 0),
+        raw=stats,
+    )
+
+
+def format_bytes(size: float) -> str:
+    for unit in ("B", "kB", "MB", "GB"):
+        if size < 1000:
+            return f"{size:.1f}{unit}" if unit != "B" else f"{size:.0f}{unit}"
+        size /= 1000
+    return f"{size:.1f}TB"
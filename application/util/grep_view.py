@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from collections.abc import Callable, Iterable
+
+
+class GrepView:
+    """Sorted absolute numbers of the lines a grep view shows, i.e the matches
+    of a search and up to `context` lines before and after each of them.
+
+    The view only holds line numbers, the lines stay in the log's buffer. It is
+    built once from the matches of a search, then extended as lines and matches
+    are appended, including trailing context of the last match, and evicted
+    lines drop out of it like they drop out of the `SearchIndex`.
+
+    Every shown line also has the (absolute) first row it is drawn on, so lines
+    can span several rows while wrapping.
+    """
+
+    def __init__(self, context: int = 0) -> None:
+        self.context = context
+        self._numbers: list[int] = []
+        self._rows: list[int] = []
+        self._head = 0
+        self._rows_end = 0
+        self._next = 0
+        """Absolute number of the first line that can still be shown."""
+        self._last_match: int | None = None
+
+    def __len__(self) -> int:
+        return len(self._numbers) - self._head
+
+    def __getitem__(self, position: int) -> int:
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError("GrepView index out of range")
+        return self._numbers[self._head + position]
+
+    @property
+    def rows(self) -> int:
+        """Number of rows the shown lines cover."""
+        return self._rows_end - self._rows[self._head] if len(self) else 0
+
+    def reset(self, start: int) -> None:
+        """Show no line, the next one shown being from line `start` on."""
+        self._numbers = []
+        self._rows = []
+        self._head = 0
+        self._rows_end = 0
+        self._next = start
+        self._last_match = None
+
+    def extend(
+        self, matches: Iterable[int], end: int, height: Callable[[int], int]
+    ) -> bool:
+        """Show `matches`, sorted and newer than the ones already shown, and the
+        context around them among the lines before `end`.
+
+        Args:
+            matches: Absolute numbers of the matching lines.
+            end: Absolute number the next line appended to the log will get.
+            height: Number of rows the line with a given absolute number covers.
+
+        Returns:
+            Whether any line was added.
+        """
+        count = len(self._numbers)
+        for match in matches:
+            self._show_trailing_context(match, height)
+            self._show(range(max(self._next, match - self.context), match + 1), height)
+            self._last_match = match
+        self._show_trailing_context(end, height)
+        return len(self._numbers) != count
+
+    def _show_trailing_context(self, end: int, height: Callable[[int], int]) -> None:
+        """Show the lines after the last match, up to line `end` excluded."""
+        if self._last_match is not None:
+            last = min(self._last_match + self.context + 1, end)
+            self._show(range(self._next, last), height)
+
+    def _show(self, numbers: range, height: Callable[[int], int]) -> None:
+        for number in numbers:
+            self._numbers.append(number)
+            self._rows.append(self._rows_end)
+            self._rows_end += height(number)
+        if numbers:
+            self._next = numbers[-1] + 1
+
+    def resize_last(self, number: int, height: int) -> None:
+        """Update the rows of line `number`, after the last line was replaced."""
+        if len(self) and self._numbers[-1] == number:
+            self._rows_end = self._rows[-1] + height
+
+    def evict(self, start: int) -> bool:
+        """Drop lines before the absolute line number `start`.
+
+        Returns:
+            Whether any line was dropped.
+        """
+        self._next = max(self._next, start)
+        head = bisect_left(self._numbers, start, lo=self._head)
+        if head == self._head:
+            return False
+        self._head = head
+        if self._head > len(self._numbers) // 2:
+            del self._numbers[: self._head]
+            del self._rows[: self._head]
+            self._head = 0
+        return True
+
+    def position(self, line_number: int) -> int:
+        """Position of the first shown line at or after `line_number`."""
+        return bisect_left(self._numbers, line_number, lo=self._head) - self._head
+
+    def row(self, position: int) -> int:
+        """The first row of the shown line at `position`."""
+        if position >= len(self):
+            return self.rows
+        return self._rows[self._head + position] - self._rows[self._head]
+
+    def row_to_position(self, row: int) -> tuple[int, int]:
+        """Position of the shown line covering `row`, and the row within it."""
+        if not len(self):
+            return 0, 0
+        row += self._rows[self._head]
+        if row >= self._rows_end:
+            return len(self), 0
+        index = bisect_right(self._rows, row, lo=self._head) - 1
+        return index - self._head, row - self._rows[index]
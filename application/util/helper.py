@@ -1,22 +1,32 @@
 import datetime
+import math
 import os
 import re
-import subprocess
+from functools import cache
+from importlib import metadata
 from pathlib import Path
 
 import requests
 import yaml
-from colorama import Fore, Style
 from packaging.version import parse as version_parse
 from pydantic import BaseModel
 
 POCKER_CONFIG_BASE_PATH = Path.home() / ".config/pocker"
 
+LATEST_VERSION_TIMEOUT = 5
+"""Seconds to wait for GitHub when looking up the latest version."""
+LATEST_VERSION_TTL = 20
+"""Minutes the latest version looked up is trusted before looking it up again."""
+
 
 def get_latest_version():
-    response = requests.get(
-        "https://api.github.com/repos/pommee/Pocker/tags?per_page=1"
-    )
+    try:
+        response = requests.get(
+            "https://api.github.com/repos/pommee/Pocker/tags?per_page=1",
+            timeout=LATEST_VERSION_TIMEOUT,
+        )
+    except requests.RequestException:
+        return None  # Offline or GitHub is slow, try again next time.
 
     if response.status_code == 200:
         response: dict = response.json()[0]
@@ -26,18 +36,12 @@ def get_latest_version():
         return None
 
 
+@cache
 def get_current_version():
+    """The installed version, from the package metadata."""
     try:
-        result = subprocess.run(
-            ["pipx", "list", "--short"], text=True, capture_output=True, check=True
-        )
-
-        for line in result.stdout.splitlines():
-            if "pocker-tui" in line:
-                version = line.split()[1]
-                return version
-
-    except subprocess.CalledProcessError:
+        return metadata.version("pocker-tui")
+    except metadata.PackageNotFoundError:
         return None
 
 
@@ -59,18 +63,21 @@ def write_latest_version_fetch(version):
 
 
 def read_latest_version_fetch():
-    if not os.path.exists(POCKER_CONFIG_BASE_PATH / "latest_version_fetch.yaml"):
-        latest_version = get_latest_version()
-        write_latest_version_fetch(latest_version.base_version)
-    with open(POCKER_CONFIG_BASE_PATH / "latest_version_fetch.yaml", "r") as file:
-        fetch_dict = yaml.safe_load(file)
-        return Version_Fetch(**fetch_dict)
+    """The latest version last looked up, or None if it never was."""
+    try:
+        with open(POCKER_CONFIG_BASE_PATH / "latest_version_fetch.yaml", "r") as file:
+            fetch_dict = yaml.safe_load(file)
+            return Version_Fetch(**fetch_dict)
+    except (OSError, TypeError, ValueError, yaml.YAMLError):
+        return None
 
 
-def time_since_last_fetch():
-    return (
-        datetime.datetime.now() - read_latest_version_fetch().time_fetched
-    ).total_seconds() / 60
+def time_since_last_fetch(version_fetch=None):
+    """Minutes since the latest version was looked up, infinite if never."""
+    version_fetch = version_fetch or read_latest_version_fetch()
+    if version_fetch is None:
+        return math.inf
+    return (datetime.datetime.now() - version_fetch.time_fetched).total_seconds() / 60
 
 
 commit_and_link_pattern = (
@@ -80,6 +87,8 @@ changed_line = r"\(\[([a-f0-9]+)\]\(([^)]+)\)\)"
 
 
 def bright_text(text):
+    from colorama import Style
+
     return f"{Style.BRIGHT}{text}{Style.RESET_ALL}"
 
 
@@ -118,6 +127,8 @@ class Release:
         print(bright_text(f"\nv{self.version} Changelog\n"))
 
     def print_features(self):
+        from colorama import Fore, Style
+
         if len(self.features) == 0:
             return
         print(bright_text("Features:\n"))
@@ -132,6 +143,8 @@ class Release:
                 )
 
     def print_bug_fixes(self):
+        from colorama import Fore, Style
+
         if len(self.bug_fixes) == 0:
             return
         print(bright_text("\nBug Fixes:\n"))
@@ -0,0 +1,108 @@
+import math
+import time
+from typing import NamedTuple
+
+from application.util.log_stream import StreamLine
+
+
+class Run(NamedTuple):
+    """A line and the number of times it was logged in a row."""
+
+    line: StreamLine
+    count: int
+
+
+def coalesce(lines: list[StreamLine]) -> list[Run]:
+    """Collapse identical consecutive lines into runs."""
+    runs: list[Run] = []
+    previous = None
+    count = 0
+    for line in lines:
+        if line == previous:
+            count += 1
+            continue
+        if previous is not None:
+            runs.append(Run(previous, count))
+        previous, count = line, 1
+    if previous is not None:
+        runs.append(Run(previous, count))
+    return runs
+
+
+def format_count(count: float) -> str:
+    for divisor, suffix in ((10**6, "M"), (10**3, "k")):
+        if count >= divisor:
+            return f"{count / divisor:.1f}{suffix}"
+    return f"{count:.0f}"
+
+
+class FloodGuard:
+    """Measures the rate lines are logged at, and tells when the log viewer
+    should take its cheap path because the container floods its logs.
+
+    The rate is measured from what the `LogIngest` received, not what the
+    viewer wrote, so it is the true rate even when lines are dropped. A flood
+    starts above `threshold` lines per second and ends below half of it. While
+    flooding, identical consecutive lines are collapsed into one and, with
+    `sampling`, at most `threshold` lines per second are kept.
+    """
+
+    RATE_WINDOW = 1.0
+    """Seconds over which the rate is averaged."""
+
+    def __init__(self, threshold: int = 2000, sampling: bool = False) -> None:
+        self.threshold = threshold
+        self.sampling = sampling
+        self.reset()
+
+    def reset(self, received: int = 0, dropped: int = 0) -> None:
+        """Start measuring anew, from the given ingest counters."""
+        self.rate = 0.0
+        self.flooding = False
+        self.collapsed = 0
+        self.dropped = 0
+        self._received = received
+        self._ingest_dropped = dropped
+        self._measured_at = time.monotonic()
+
+    def measure(self, received: int, dropped: int) -> None:
+        """Update the rate from the ingest counters, i.e the total number of lines
+        received and dropped so far."""
+        now = time.monotonic()
+        elapsed = now - self._measured_at
+        if elapsed <= 0:
+            return
+        count = received - self._received
+        alpha = 1 - math.exp(-elapsed / self.RATE_WINDOW)
+        self.rate += alpha * (count / elapsed - self.rate)
+        self.dropped += dropped - self._ingest_dropped
+        self._received, self._ingest_dropped = received, dropped
+        self._measured_at = now
+
+        limit = self.threshold / 2 if self.flooding else self.threshold
+        self.flooding = self.threshold > 0 and self.rate > limit
+
+    def thin(self, lines: list[StreamLine], interval: float) -> list[Run]:
+        """Collapse `lines` into runs and, with `sampling`, keep as many of those
+        as the threshold allows per `interval` seconds, evenly spread."""
+        runs = coalesce(lines)
+        budget = max(1, int(self.threshold * interval))
+        if self.sampling and len(runs) > budget:
+            step = len(runs) / budget
+            runs = [runs[int(i * step)] for i in range(budget - 1)] + [runs[-1]]
+            self.dropped += len(lines) - sum(run.count for run in runs)
+        self.collapsed += sum(run.count - 1 for run in runs)
+        return runs
+
+    def summary(self) -> str:
+        """The rate, and what was left out of the log, for the log's border."""
+        if not self.rate and not self.collapsed and not self.dropped:
+            return ""
+        parts = [f"{format_count(self.rate)} lines/s"]
+        if self.flooding:
+            parts.append("flood")
+        if self.collapsed:
+            parts.append(f"{format_count(self.collapsed)} collapsed")
+        if self.dropped:
+            parts.append(f"{format_count(self.dropped)} dropped")
+        return ", ".join(parts)
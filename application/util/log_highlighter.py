@@ -0,0 +1,141 @@
+import re
+from functools import lru_cache
+
+from rich.highlighter import Highlighter
+from rich.text import Span, Text
+
+_HEX = r"[0-9A-Fa-f]"
+
+# Every pattern is a named group, named after the style of its matches with "."
+# replaced by "__". At any position the first matching pattern wins, so the more
+# specific ones come first. Patterns are grouped behind a prefix checking the
+# character they start with, so at most positions only a few of them are tried.
+# Other words are skipped whole instead of being tried at every letter.
+_PATTERN_GROUPS = (
+    (
+        r"(?<!\w)(?=[A-Z])",
+        (
+            ("logging__level__critical", r"(?:CRITICAL|FATAL|PANIC|EMERG|ALERT)\b"),
+            ("logging__level__error", r"(?:ERROR|ERR|FAIL(?:ED|URE)?)\b"),
+            ("logging__level__warning", r"(?:WARNING|WARN)\b"),
+            ("logging__level__info", r"(?:INFO|NOTICE)\b"),
+            ("logging__level__debug", r"(?:DEBUG|TRACE)\b"),
+        ),
+    ),
+    (
+        "",
+        (
+            ("repr__attrib_value", r"(?<==)(?![-\d\"'])[^\s\"',;]+"),
+            ("repr__attrib_name", r"^[ \t]*[\w.-]+(?=:[ \t]|:$)"),
+        ),
+    ),
+    (
+        r"(?=[-0-9A-Fa-f:])",
+        (
+            (
+                "log__time",
+                (
+                    r"\b\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?"
+                    r"(?:Z|[+-]\d{2}:?\d{2})?|\b\d{2}:\d{2}:\d{2}(?:[.,]\d+)?\b"
+                ),
+            ),
+            (
+                "repr__uuid",
+                rf"\b{_HEX}{{8}}-{_HEX}{{4}}-{_HEX}{{4}}-{_HEX}{{4}}-{_HEX}{{12}}\b",
+            ),
+            ("repr__ipv4", r"\b(?:\d{1,3}\.){3}\d{1,3}(?::\d{1,5})?\b"),
+            (
+                "repr__ipv6",
+                (
+                    rf"\b(?:{_HEX}{{1,4}}:){{7}}{_HEX}{{1,4}}\b|(?<![\w:])"
+                    rf"(?:{_HEX}{{1,4}}(?::{_HEX}{{1,4}})*)?::{_HEX}{{1,4}}(?::{_HEX}{{1,4}})*\b"
+                ),
+            ),
+            (
+                "repr__number",
+                (
+                    r"(?<![\w.])-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?"
+                    r"(?:[nuµm]?s|[mhd]|[KMGT]i?B|B|%)?(?!\w|\.\d)|\b0x[0-9a-fA-F]+\b"
+                ),
+            ),
+        ),
+    ),
+    (
+        r"(?<!\w)(?=[A-Za-z_])",
+        (
+            (
+                "repr__url",
+                r"(?:https?|wss?|ftp|file)://[-0-9a-zA-Z$_+!`(),.?/;:&=%#~@]*",
+            ),
+            ("repr__bool_true", r"(?:true|True)\b"),
+            ("repr__bool_false", r"(?:false|False)\b"),
+            ("repr__none", r"(?:null|None|nil)\b"),
+            ("skip", r"\w+"),
+        ),
+    ),
+    (
+        r"(?=[\"'])",
+        (
+            ("json__key", r'"(?:[^"\\\n]|\\.)*"(?=\s*:)'),
+            ("repr__str", r'"(?:[^"\\\n]|\\.)*"|(?<![\\\w])\'[^\'\n]*\''),
+        ),
+    ),
+    (
+        "",
+        (
+            ("repr__attrib_equal", r"="),
+            ("repr__brace", r"[][{}()]"),
+        ),
+    ),
+)
+
+_LOG_PATTERN = re.compile(
+    "|".join(
+        prefix
+        + "(?:"
+        + "|".join(f"(?P<{name}>{pattern})" for name, pattern in patterns)
+        + ")"
+        for prefix, patterns in _PATTERN_GROUPS
+    ),
+    re.MULTILINE,
+)
+_STYLES = {
+    name: None if name == "skip" else name.replace("__", ".")
+    for _, patterns in _PATTERN_GROUPS
+    for name, _ in patterns
+}
+_KEY_CHARACTERS = frozenset("_.-")
+
+
+@lru_cache(maxsize=4096)
+def _log_spans(plain: str) -> tuple[Span, ...]:
+    spans = []
+    for match in _LOG_PATTERN.finditer(plain):
+        style = _STYLES[match.lastgroup]
+        if style is None:
+            continue
+        start, end = match.span()
+        if style == "repr.attrib_equal":
+            # The key is found from the "=" back, instead of trying every word.
+            key = start
+            while key and (
+                plain[key - 1].isalnum() or plain[key - 1] in _KEY_CHARACTERS
+            ):
+                key -= 1
+            if key < start:
+                spans.append(Span(key, start, "repr.attrib_name"))
+        spans.append(Span(start, end, style))
+    return tuple(spans)
+
+
+class LogHighlighter(Highlighter):
+    """Highlights timestamps, log levels, addresses, IDs, key=value pairs and
+    JSON in log lines.
+
+    Unlike `ReprHighlighter`, which runs a regex per kind of match, every pattern
+    is combined into one regex, so a line is scanned once. The spans found are
+    cached by line, as logs repeat the same lines over and over.
+    """
+
+    def highlight(self, text: Text) -> None:
+        text.spans.extend(_log_spans(text.plain))
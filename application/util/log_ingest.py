@@ -0,0 +1,36 @@
+from collections import deque
+
+from application.util.log_stream import StreamLine
+
+
+class LogIngest:
+    """Hand-off of log lines from a docker stream to the log viewer.
+
+    The streaming task `put`s lines as they arrive, and the log viewer
+    `drain`s everything collected so far on its own schedule, writing the lines
+    in one batch instead of one at a time. With a `maxlen`, only the newest
+    lines are kept until the next drain. `received` and `dropped` count the
+    lines put and the ones dropped that way.
+    """
+
+    def __init__(self, maxlen: int | None = None) -> None:
+        self._maxlen = maxlen
+        self._pending: deque[StreamLine] = deque(maxlen=maxlen)
+        self.received = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def put(self, line: StreamLine) -> None:
+        self.put_many([line])
+
+    def put_many(self, lines: list[StreamLine]) -> None:
+        self.received += len(lines)
+        if self._maxlen is not None:
+            self.dropped += max(0, len(self._pending) + len(lines) - self._maxlen)
+        self._pending.extend(lines)
+
+    def drain(self) -> list[StreamLine]:
+        pending, self._pending = self._pending, deque(maxlen=self._maxlen)
+        return list(pending)
@@ -0,0 +1,34 @@
+from collections import deque
+from typing import NamedTuple
+
+from application.util.log_stream import LogStreamDecoder
+from application.util.search_index import compile_search
+
+
+class LogHit(NamedTuple):
+    """A matching log line, without the timestamp docker prefixed it with."""
+
+    timestamp: str
+    text: str
+
+
+def search_log_data(
+    data: bytes, multiplexed: bool, keyword: str, flags: int, limit: int
+) -> tuple[int, list[LogHit]]:
+    """Decode a raw log stream, with docker's timestamps, and search it.
+
+    Runs in the processes of `LogSearch`, so only the hits are sent back.
+
+    Returns:
+        The number of matching lines, and the last `limit` of them.
+    """
+    decoder = LogStreamDecoder(multiplexed=multiplexed)
+    search = compile_search(keyword, flags).search
+    count = 0
+    hits: deque[LogHit] = deque(maxlen=limit)
+    for line in decoder.feed(data) + decoder.flush():
+        timestamp, _, text = line.text.partition(" ")
+        if search(text):
+            count += 1
+            hits.append(LogHit(timestamp, text))
+    return count, list(hits)
@@ -0,0 +1,165 @@
+import calendar
+import codecs
+import time
+from functools import lru_cache
+from typing import NamedTuple
+
+STDOUT = 1
+STDERR = 2
+
+_FRAME_HEADER_SIZE = 8
+
+
+class StreamLine(NamedTuple):
+    text: str
+    stream: int = STDOUT
+
+
+class LineSplitter:
+    """Incrementally split a byte stream into decoded lines.
+
+    Chunks can end anywhere, including in the middle of a line or of a
+    multi-byte UTF-8 character; the unfinished part is kept until the rest of
+    it arrives.
+    """
+
+    def __init__(self) -> None:
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._partial = ""
+
+    def feed(self, data: bytes) -> list[str]:
+        text = self._decoder.decode(data)
+        if "\n" not in text:
+            self._partial += text
+            return []
+
+        lines = (self._partial + text).split("\n")
+        self._partial = lines.pop()
+        return [line.rstrip() for line in lines]
+
+    def flush(self) -> list[str]:
+        """Return whatever is left of an unterminated last line."""
+        text = (self._partial + self._decoder.decode(b"", final=True)).rstrip()
+        self._partial = ""
+        return [text] if text else []
+
+
+class LogStreamDecoder:
+    """Turn raw chunks of a docker log stream into lines tagged by stream.
+
+    Containers without a TTY send logs multiplexed: every frame starts with an
+    8 byte header holding the stream (stdout/stderr) and the payload size. With
+    a TTY the stream is plain stdout bytes.
+    """
+
+    def __init__(self, multiplexed: bool) -> None:
+        self._multiplexed = multiplexed
+        self._buffer = bytearray()
+        self._splitters = {STDOUT: LineSplitter(), STDERR: LineSplitter()}
+
+    def feed(self, data: bytes) -> list[StreamLine]:
+        if not self._multiplexed:
+            return self._split(STDOUT, data)
+
+        buffer = self._buffer
+        buffer += data
+        lines: list[StreamLine] = []
+        run_stream, run = STDOUT, bytearray()
+        position, size = 0, len(buffer)
+
+        while size - position >= _FRAME_HEADER_SIZE:
+            stream = STDERR if buffer[position] == STDERR else STDOUT
+            length = int.from_bytes(buffer[position + 4 : position + 8], "big")
+            end = position + _FRAME_HEADER_SIZE + length
+            if end > size:
+                break  # Wait for the rest of the frame.
+
+            # Consecutive frames from the same stream are split in one go.
+            if stream != run_stream and run:
+                lines.extend(self._split(run_stream, run))
+                run = bytearray()
+            run_stream = stream
+            run += buffer[position + _FRAME_HEADER_SIZE : end]
+            position = end
+
+        if run:
+            lines.extend(self._split(run_stream, run))
+        del buffer[:position]
+        return lines
+
+    def flush(self) -> list[StreamLine]:
+        return [
+            StreamLine(text, stream)
+            for stream, splitter in self._splitters.items()
+            for text in splitter.flush()
+        ]
+
+    def _split(self, stream: int, data: bytes) -> list[StreamLine]:
+        return [StreamLine(text, stream) for text in self._splitters[stream].feed(data)]
+
+
+@lru_cache(maxsize=64)
+def _parse_seconds(seconds: str) -> int:
+    return calendar.timegm(time.strptime(seconds, "%Y-%m-%dT%H:%M:%S"))
+
+
+def parse_timestamp(timestamp: str) -> int:
+    """Nanoseconds since the epoch of a timestamp as docker prefixes log lines
+    with, e.g "2024-05-01T12:00:00.123456789Z" (always UTC).
+
+    Raises:
+        ValueError: If `timestamp` isn't one.
+    """
+    seconds, _, fraction = timestamp.removesuffix("Z").partition(".")
+    return _parse_seconds(seconds) * 10**9 + int(fraction[:9].ljust(9, "0"))
+
+
+class LogCursor:
+    """Position in a container's logs, to resume following them from.
+
+    The logs are followed with docker's `timestamps`, so every line starts with
+    the time it was logged. `strip` removes those, remembering the last one.
+    Resuming `since` that timestamp includes the lines logged at that very
+    nanosecond again, so as many of them as were already read are skipped.
+    """
+
+    def __init__(self) -> None:
+        self.timestamp: str | None = None
+        self._count = 0
+        self._boundary: int | None = None
+        self._skip = 0
+
+    def resume(self) -> str | None:
+        """The `since` to resume from, i.e the timestamp of the last line read as
+        "seconds.nanoseconds", or None if no line was read yet."""
+        try:
+            self._boundary = parse_timestamp(self.timestamp or "")
+        except ValueError:
+            return None  # Nothing read yet, or a line without a timestamp.
+        self._skip = self._count
+        seconds, nanoseconds = divmod(self._boundary, 10**9)
+        return f"{seconds}.{nanoseconds:09d}"
+
+    def strip(self, lines: list[StreamLine]) -> list[StreamLine]:
+        """Remove the timestamp of every line, and the lines read before resuming."""
+        stripped = []
+        for line in lines:
+            timestamp, _, text = line.text.partition(" ")
+            if self._boundary is not None:
+                try:
+                    logged = parse_timestamp(timestamp)
+                except ValueError:
+                    logged = self._boundary + 1  # Can't tell, keep it.
+                if logged < self._boundary:
+                    continue
+                if logged == self._boundary and self._skip:
+                    self._skip -= 1
+                    continue
+                self._boundary = None
+
+            if timestamp == self.timestamp:
+                self._count += 1
+            else:
+                self.timestamp, self._count = timestamp, 1
+            stripped.append(StreamLine(text, line.stream))
+        return stripped
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator, Sequence
+from typing import Generic, TypeVar, overload
+
+T = TypeVar("T")
+
+
+class RingBuffer(Sequence[T], Generic[T]):
+    """Sequence with an optional fixed capacity, evicting its oldest items in O(1).
+
+    Every item gets an absolute index when appended, starting from 0. Absolute
+    indices never change while an item is stored; `start` moves forward as old
+    items are evicted and `end` is the index the next appended item will get.
+    Regular sequence indexing (`buffer[i]`) is relative to `start`.
+    """
+
+    def __init__(self, capacity: int | None = None) -> None:
+        self._capacity = capacity
+        self._items: list[T] = []
+        self._head = 0
+        self.start = 0
+
+    @property
+    def capacity(self) -> int | None:
+        return self._capacity
+
+    @capacity.setter
+    def capacity(self, capacity: int | None) -> None:
+        items = list(self)
+        if capacity is not None and len(items) > capacity:
+            self.start += len(items) - capacity
+            items = items[len(items) - capacity :]
+        self._items = items
+        self._head = 0
+        self._capacity = capacity
+
+    @property
+    def end(self) -> int:
+        return self.start + len(self._items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @overload
+    def __getitem__(self, index: int) -> T: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[T]: ...
+
+    def __getitem__(self, index: int | slice) -> T | list[T]:
+        size = len(self._items)
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(size))]
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("RingBuffer index out of range")
+        if self._head:
+            index = (self._head + index) % size
+        return self._items[index]
+
+    def __setitem__(self, index: int, item: T) -> None:
+        size = len(self._items)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("RingBuffer index out of range")
+        self._items[(self._head + index) % size] = item
+
+    def __iter__(self) -> Iterator[T]:
+        yield from self._items[self._head :]
+        yield from self._items[: self._head]
+
+    def get(self, absolute_index: int) -> T:
+        """Get an item by its absolute index."""
+        if absolute_index < self.start:
+            raise IndexError("RingBuffer item has been evicted")
+        return self[absolute_index - self.start]
+
+    def append(self, item: T) -> None:
+        if self._capacity is None or len(self._items) < self._capacity:
+            self._items.append(item)
+            return
+        if self._capacity == 0:
+            self.start += 1
+            return
+        self._items[self._head] = item
+        self._head = (self._head + 1) % self._capacity
+        self.start += 1
+
+    def extend(self, items: Iterable[T]) -> None:
+        for item in items:
+            self.append(item)
+
+    def clear(self) -> None:
+        """Remove all items. Absolute indices keep counting from `end`."""
+        self.start = self.end
+        self._items = []
+        self._head = 0
@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import re
+from bisect import bisect_left
+from collections.abc import Iterable, Iterator, Sequence
+from typing import Protocol
+
+from application.util.ring_buffer import RingBuffer
+from application.util.structured_log import FieldFilter
+
+_REGEX_METACHARACTERS = frozenset(".^$*+?{}[]\\|()")
+
+
+class SearchableLine(Protocol):
+    text: str
+
+
+def compile_search(keyword: str, flags: int) -> re.Pattern[str]:
+    try:
+        return re.compile(keyword, flags)
+    except re.error:
+        # Incomplete expressions, i.e while typing, are searched literally.
+        return re.compile(re.escape(keyword), flags)
+
+
+def is_literal(keyword: str) -> bool:
+    return not _REGEX_METACHARACTERS.intersection(keyword)
+
+
+def scan(
+    pattern: re.Pattern[str], numbers: Sequence[int], texts: list[str]
+) -> list[int]:
+    """Line numbers of the `texts` matching `pattern`."""
+    search = pattern.search
+    return [number for number, text in zip(numbers, texts) if search(text)]
+
+
+class SearchIndex:
+    """Sorted absolute line numbers of the lines matching a search.
+
+    The index is kept up to date incrementally: lines appended to the log are
+    tested as they arrive and evicted lines drop out of it. When a literal
+    keyword is extended, only the previous matches are searched again.
+
+    Lines already in the log are scanned outside the index, i.e in a worker,
+    and merged back in chunks while `scanning`. Every search gets a new
+    `generation` so results of an abandoned scan are ignored.
+
+    A search for field `filters` of a structured log has no pattern; lines
+    are matched against the log's records and their numbers handed to
+    `add_matches` instead.
+    """
+
+    def __init__(self) -> None:
+        self.keyword = ""
+        self.flags = 0
+        self.pattern: re.Pattern[str] | None = None
+        self.filters: list[FieldFilter] | None = None
+        self.generation = 0
+        self.scanning = False
+        self._matches: list[int] = []
+        self._head = 0
+
+    def __len__(self) -> int:
+        return len(self._matches) - self._head
+
+    def __getitem__(self, index: int) -> int:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("SearchIndex index out of range")
+        return self._matches[self._head + index]
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._matches[self._head :])
+
+    def __contains__(self, line_number: int) -> bool:
+        index = bisect_left(self._matches, line_number, lo=self._head)
+        return index < len(self._matches) and self._matches[index] == line_number
+
+    def begin(
+        self, keyword: str, flags: int, lines: RingBuffer[SearchableLine]
+    ) -> tuple[Sequence[int], list[str]]:
+        """Start a new search of `lines`.
+
+        Lines appended from now on are matched as they arrive; the lines already
+        in the log are returned, as absolute line numbers and their texts, to be
+        scanned with `scan` and handed back through `merge`, newest first.
+        """
+        refine = (
+            self.pattern is not None
+            and not self.scanning
+            and flags == self.flags
+            and keyword.startswith(self.keyword)
+            and is_literal(keyword)
+        )
+        self.keyword, self.flags = keyword, flags
+        self.pattern = compile_search(keyword, flags)
+        self.filters = None
+        self.generation += 1
+        self.scanning = True
+
+        numbers: Sequence[int]
+        if refine:
+            numbers = [number for number in self if number >= lines.start]
+            texts = [lines.get(number).text for number in numbers]
+        else:
+            numbers = range(lines.start, lines.end)
+            texts = [line.text for line in lines]
+
+        self._matches = []
+        self._head = 0
+        return numbers, texts
+
+    def begin_filtered(
+        self, keyword: str, filters: list[FieldFilter], matches: list[int]
+    ) -> None:
+        """Start a search for lines matching `filters`, i.e the sorted absolute
+        line numbers `matches` and the ones added later on."""
+        self.keyword, self.flags, self.pattern = keyword, 0, None
+        self.filters = filters
+        self.generation += 1
+        self.scanning = False
+        self._matches = matches
+        self._head = 0
+
+    def add_matches(self, matches: list[int]) -> bool:
+        """Add the sorted absolute line numbers `matches`, newer than every
+        match already in the index.
+
+        Returns:
+            Whether any match was added.
+        """
+        self._matches.extend(matches)
+        return bool(matches)
+
+    def merge(self, generation: int, matches: list[int], start: int) -> bool:
+        """Add scanned `matches` older than every match already in the index.
+
+        Args:
+            generation: The generation the matches were scanned for.
+            matches: Sorted absolute line numbers.
+            start: Absolute number of the oldest line still in the log.
+
+        Returns:
+            Whether the matches were added.
+        """
+        if generation != self.generation:
+            return False
+        self._matches[self._head : self._head] = [
+            number for number in matches if number >= start
+        ]
+        return True
+
+    def finish(self, generation: int) -> None:
+        if generation == self.generation:
+            self.scanning = False
+
+    def clear(self) -> None:
+        """Forget the search, new lines are no longer tested."""
+        self.keyword, self.flags, self.pattern = "", 0, None
+        self.filters = None
+        self.generation += 1
+        self.scanning = False
+        self._matches = []
+        self._head = 0
+
+    def add_lines(self, start: int, lines: Iterable[SearchableLine]) -> bool:
+        """Test appended lines, the first one having the absolute number `start`.
+
+        Returns:
+            Whether any of the lines matched.
+        """
+        if self.pattern is None:
+            return False
+        search = self.pattern.search
+        count = len(self._matches)
+        self._matches.extend(
+            number
+            for number, line in enumerate(lines, start=start)
+            if search(line.text)
+        )
+        return len(self._matches) != count
+
+    def evict(self, start: int) -> bool:
+        """Drop matches on lines before the absolute line number `start`.
+
+        Returns:
+            Whether any match was dropped.
+        """
+        head = bisect_left(self._matches, start, lo=self._head)
+        if head == self._head:
+            return False
+        self._head = head
+        if self._head > len(self._matches) // 2:
+            del self._matches[: self._head]
+            self._head = 0
+        return True
+
+    def discard_from(self, line_number: int) -> bool:
+        """Drop matches at or after the absolute line number `line_number`, i.e
+        of lines replaced since they were tested.
+
+        Returns:
+            Whether any match was dropped.
+        """
+        index = bisect_left(self._matches, line_number, lo=self._head)
+        if index == len(self._matches):
+            return False
+        del self._matches[index:]
+        return True
+
+    def since(self, line_number: int) -> list[int]:
+        """Matches at or after the absolute line number `line_number`."""
+        return self._matches[bisect_left(self._matches, line_number, lo=self._head) :]
+
+    def position(self, line_number: int) -> int:
+        """Position of the first match at or after `line_number`."""
+        return bisect_left(self._matches, line_number, lo=self._head) - self._head
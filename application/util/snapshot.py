@@ -0,0 +1,48 @@
+import json
+import os
+from typing import Any, NamedTuple
+
+from application.util.helper import POCKER_CONFIG_BASE_PATH
+
+SNAPSHOT_PATH = POCKER_CONFIG_BASE_PATH / "snapshot.json"
+SNAPSHOT_VERSION = 1
+
+
+class Snapshot(NamedTuple):
+    """The containers and images of the last session, to paint the UI from
+    before the daemon has answered.
+
+    Containers are kept as the attributes "Id", "Name" and "State", images as
+    "Id" and "RepoTags", i.e what the list endpoints return.
+    """
+
+    api_version: str
+    containers: list[dict[str, Any]]
+    images: list[dict[str, Any]]
+    selected: str | None
+
+
+def read_snapshot() -> Snapshot | None:
+    try:
+        with open(SNAPSHOT_PATH) as file:
+            data = json.load(file)
+        if data.pop("version", None) != SNAPSHOT_VERSION:
+            return None
+        return Snapshot(**data)
+    except (OSError, ValueError, TypeError):
+        return None  # Missing, from another version or corrupt.
+
+
+def write_snapshot(snapshot: Snapshot) -> None:
+    temporary = SNAPSHOT_PATH.with_suffix(".tmp")
+    try:
+        SNAPSHOT_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with open(temporary, "w") as file:
+            json.dump(
+                {"version": SNAPSHOT_VERSION, **snapshot._asdict()},
+                file,
+                separators=(",", ":"),
+            )
+        os.replace(temporary, SNAPSHOT_PATH)
+    except OSError:
+        pass  # Only means the next startup waits for the daemon.
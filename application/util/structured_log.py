@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+import json
+import re
+from collections.abc import Iterable
+from typing import Any, NamedTuple
+
+from rich.text import Text
+
+from application.util.ring_buffer import RingBuffer
+
+FIELDS = ("ts", "level", "msg", "logger", "trace_id")
+
+# Names of the fields in the logging libraries' JSON, most common first.
+_ALIASES = {
+    "ts": ("ts", "time", "timestamp", "@timestamp", "t", "date"),
+    "level": ("level", "lvl", "severity", "levelname", "log.level", "loglevel"),
+    "msg": ("msg", "message", "@message", "event", "text"),
+    "logger": ("logger", "logger_name", "name", "component", "module"),
+    "trace_id": ("trace_id", "traceId", "traceID", "trace.id", "trace"),
+}
+
+LEVELS = {
+    "trace": 0,
+    "debug": 10,
+    "info": 20,
+    "notice": 25,
+    "warn": 30,
+    "warning": 30,
+    "error": 40,
+    "err": 40,
+    "critical": 50,
+    "fatal": 50,
+    "panic": 50,
+    "emerg": 50,
+    "alert": 50,
+}
+# Numeric levels, as logged by e.g pino and bunyan.
+_NUMERIC_LEVELS = {10: 0, 20: 10, 30: 20, 40: 30, 50: 40, 60: 50}
+_LEVEL_STYLES = {
+    0: "logging.level.notset",
+    10: "logging.level.debug",
+    20: "logging.level.info",
+    25: "logging.level.info",
+    30: "logging.level.warning",
+    40: "logging.level.error",
+    50: "logging.level.critical",
+}
+UNKNOWN_LEVEL = -1
+
+
+class Record(NamedTuple):
+    """The common fields of a JSON log line, as text, and the level's rank."""
+
+    ts: str | None
+    level: str | None
+    msg: str | None
+    logger: str | None
+    trace_id: str | None
+    rank: int
+
+
+def _text(value: Any) -> str | None:
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value) if isinstance(value, (dict, list)) else str(value)
+
+
+def _rank(level: Any) -> int:
+    if isinstance(level, int) and not isinstance(level, bool):
+        return _NUMERIC_LEVELS.get(level, UNKNOWN_LEVEL)
+    if isinstance(level, str):
+        return LEVELS.get(level.lower(), UNKNOWN_LEVEL)
+    return UNKNOWN_LEVEL
+
+
+def parse_record(line: str) -> Record | None:
+    """The fields of `line`, or None if it isn't a JSON object."""
+    line = line.strip()
+    if not (line.startswith("{") and line.endswith("}")):
+        return None  # Fast path, most other lines are rejected here.
+    try:
+        data = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+
+    fields = []
+    for field in FIELDS:
+        value = None
+        for alias in _ALIASES[field]:
+            if alias in data:
+                value = data[alias]
+                break
+        fields.append(value)
+    ts, level, msg, logger, trace_id = fields
+    return Record(
+        _text(ts),
+        _text(level),
+        _text(msg),
+        _text(logger),
+        _text(trace_id),
+        _rank(level),
+    )
+
+
+def parse_records(lines: Iterable[str]) -> list[Record | None]:
+    return [parse_record(line) for line in lines]
+
+
+def render_record(record: Record, columns: Iterable[str]) -> Text:
+    """The record's `columns` as one line, missing fields left out."""
+    text = Text()
+    for column in columns:
+        value = getattr(record, column, None)
+        if value is None:
+            continue
+        if text:
+            text.append(" ")
+        if column == "ts":
+            text.append(value, "log.time")
+        elif column == "level":
+            style = _LEVEL_STYLES.get(record.rank, "")
+            text.append(f"{value.upper():<5}", style)
+        elif column == "logger":
+            text.append(f"[{value}]", "repr.attrib_name")
+        elif column == "trace_id":
+            text.append(f"trace_id={value}", "dim")
+        else:
+            text.append(value)
+    return text
+
+
+class FieldFilter(NamedTuple):
+    """A condition on a field, e.g "level>=warn" or "msg~timeout"."""
+
+    field: str
+    operator: str
+    value: str
+
+    def test(self, value: str | None) -> bool:
+        if value is None:
+            return self.operator == "!="
+        match self.operator:
+            case "=":
+                return value == self.value
+            case "!=":
+                return value != self.value
+            case "~":
+                return self.value.lower() in value.lower()
+            case ">=":
+                return value >= self.value
+            case "<=":
+                return value <= self.value
+            case ">":
+                return value > self.value
+            case "<":
+                return value < self.value
+        return False
+
+    def test_rank(self, rank: int) -> bool:
+        """Test the rank of a level, for a filter on the level's name."""
+        if rank == UNKNOWN_LEVEL:
+            return self.operator == "!="
+        wanted = LEVELS[self.value.lower()]
+        match self.operator:
+            case "=":
+                return rank == wanted
+            case "!=":
+                return rank != wanted
+            case ">=":
+                return rank >= wanted
+            case "<=":
+                return rank <= wanted
+            case ">":
+                return rank > wanted
+            case "<":
+                return rank < wanted
+        return False
+
+
+_FILTER = re.compile(
+    r"\s*(?P<field>\w+)(?P<operator>>=|<=|!=|=|>|<|~)"
+    r"(?:\"(?P<quoted>[^\"]*)\"|(?P<value>\S+))\s*"
+)
+
+
+def parse_filters(query: str) -> list[FieldFilter] | None:
+    """The filters of `query`, or None if it isn't made of filters only, i.e
+    it is an ordinary search."""
+    filters = []
+    position = 0
+    while position < len(query):
+        match = _FILTER.match(query, position)
+        if match is None or match.group("field") not in FIELDS:
+            return None
+        value = match.group("value") or match.group("quoted") or ""
+        operator = match.group("operator")
+        if (
+            match.group("field") == "level"
+            and operator != "~"
+            and value.lower() not in LEVELS
+        ):
+            return None
+        filters.append(FieldFilter(match.group("field"), operator, value))
+        position = match.end()
+    return filters or None
+
+
+class LogRecords:
+    """Records of a structured log's lines, i.e of one JSON object per line,
+    stored by column so filters like "level>=warn trace_id=abc" test one list
+    per field instead of parsing the lines again.
+
+    Like the log's `RingBuffer`, the records are indexed by absolute line
+    number and the oldest ones are evicted beyond `capacity`. Lines that aren't
+    JSON have a record of None in every column.
+    """
+
+    def __init__(self, capacity: int | None = None) -> None:
+        self.columns: dict[str, RingBuffer[str | None]] = {}
+        self.ranks: RingBuffer[int] = RingBuffer(capacity)
+        self.reset(0, capacity)
+
+    @property
+    def start(self) -> int:
+        return self.ranks.start
+
+    @property
+    def end(self) -> int:
+        return self.ranks.end
+
+    def __len__(self) -> int:
+        return len(self.ranks)
+
+    def reset(self, start: int, capacity: int | None) -> None:
+        """Forget every record, the next one being of line `start`."""
+        self.ranks = RingBuffer(capacity)
+        self.ranks.start = start
+        for field in FIELDS:
+            self.columns[field] = column = RingBuffer(capacity)
+            column.start = start
+
+    def extend(self, records: Iterable[Record | None]) -> None:
+        columns = [self.columns[field] for field in FIELDS]
+        for record in records:
+            if record is None:
+                for column in columns:
+                    column.append(None)
+                self.ranks.append(UNKNOWN_LEVEL)
+                continue
+            for column, value in zip(columns, record):
+                column.append(value)
+            self.ranks.append(record.rank)
+
+    def set(self, number: int, record: Record | None) -> None:
+        """Replace the record of line `number`, e.g after the line was replaced."""
+        index = number - self.start
+        for field, column in self.columns.items():
+            column[index] = None if record is None else getattr(record, field)
+        self.ranks[index] = UNKNOWN_LEVEL if record is None else record.rank
+
+    def matching(self, filters: list[FieldFilter], start: int = 0) -> list[int]:
+        """Absolute numbers of the lines from `start` matching every filter."""
+        numbers: Iterable[int] = range(max(start, self.start), self.end)
+        for field_filter in filters:
+            if field_filter.field == "level" and field_filter.operator != "~":
+                column: RingBuffer = self.ranks
+                test = field_filter.test_rank
+            else:
+                column = self.columns[field_filter.field]
+                test = field_filter.test
+            # Only the lines still matching are looked up, not the whole column.
+            value = column.get
+            numbers = [number for number in numbers if test(value(number))]
+        return list(numbers)
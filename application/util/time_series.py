@@ -0,0 +1,73 @@
+from array import array
+from typing import NamedTuple
+
+
+class Downsampled(NamedTuple):
+    """Buckets of consecutive samples: the time of each bucket's first sample and
+    the minimum, maximum and mean of its values."""
+
+    times: list[float]
+    minimums: list[float]
+    maximums: list[float]
+    means: list[float]
+
+
+class TimeSeries:
+    """Fixed-size series of (timestamp, value) samples, overwriting the oldest.
+
+    Samples are stored in two preallocated arrays of doubles, so memory doesn't
+    grow with uptime.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = max(capacity, 1)
+        self._times = array("d", bytes(8 * self.capacity))
+        self._values = array("d", bytes(8 * self.capacity))
+        self._head = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, timestamp: float, value: float) -> None:
+        index = (self._head + self._size) % self.capacity
+        self._times[index] = timestamp
+        self._values[index] = value
+        if self._size < self.capacity:
+            self._size += 1
+        else:
+            self._head = (self._head + 1) % self.capacity
+
+    def clear(self) -> None:
+        self._head = self._size = 0
+
+    def _ordered(self, values: array) -> array:
+        end = self._head + self._size
+        if end <= self.capacity:
+            return values[self._head : end]
+        return values[self._head :] + values[: end - self.capacity]
+
+    def times(self) -> array:
+        return self._ordered(self._times)
+
+    def values(self) -> array:
+        return self._ordered(self._values)
+
+    def downsample(self, buckets: int) -> Downsampled:
+        """Reduce the series to at most `buckets` points, i.e one per plot column."""
+        times, values = self.times(), self.values()
+        size = len(values)
+        if size <= buckets:
+            points = list(values)
+            return Downsampled(list(times), points, points, points)
+
+        result = Downsampled([], [], [], [])
+        for bucket in range(buckets):
+            start = bucket * size // buckets
+            end = (bucket + 1) * size // buckets
+            chunk = values[start:end]
+            result.times.append(times[start])
+            result.minimums.append(min(chunk))
+            result.maximums.append(max(chunk))
+            result.means.append(sum(chunk) / len(chunk))
+        return result
@@ -1,16 +1,175 @@
-import asyncio
+from collections import deque
+from typing import Any, ClassVar, NamedTuple
 
 from docker.models.containers import Container
+from rich.segment import Segment
 from textual import events, on
 from textual.app import ComposeResult
+from textual.binding import Binding, BindingType
+from textual.cache import LRUCache
 from textual.containers import Horizontal
+from textual.geometry import Region, Size
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
 from textual.widget import Widget
-from textual.widgets import Button, Label, ListItem, ListView
+from textual.widgets import Button
 
+from application.container_registry import ContainerEntry
 from application.docker_manager import DockerManager
 from application.messages import ClickedContainer
 
 
+class ContainerEvent(NamedTuple):
+    action: str
+    container_id: str
+    name: str | None
+    container: Container | None
+
+
+class ContainerList(ScrollView, can_focus=True):
+    """List of containers rendering only the rows on screen.
+
+    Rows are the docker manager's registry entries rather than widgets, so the
+    cost of showing, scrolling and sorting the list doesn't grow with the
+    number of containers. Every entry keeps its own row number.
+    """
+
+    COMPONENT_CLASSES: ClassVar[set[str]] = {
+        "containerlist--running",
+        "containerlist--down",
+        "containerlist--selected",
+    }
+
+    BINDINGS: ClassVar[list[BindingType]] = [
+        Binding("down,j", "cursor_down", show=False),
+        Binding("up,k", "cursor_up", show=False),
+        Binding("enter", "select_cursor", show=False),
+    ]
+
+    def __init__(
+        self,
+        docker_manager: DockerManager,
+        *,
+        name: str | None = None,
+        id: str | None = None,
+        classes: str | None = None,
+        disabled: bool = False,
+    ) -> None:
+        super().__init__(name=name, id=id, classes=classes, disabled=disabled)
+        self.docker_manager = docker_manager
+        self.rows: list[ContainerEntry] = []
+        self.selected = 0
+        self._line_cache: LRUCache[tuple[int, int, int], Strip] = LRUCache(256)
+
+    @property
+    def selected_name(self) -> str | None:
+        return self.rows[self.selected].name if self.rows else None
+
+    def on_mount(self) -> None:
+        self.rebuild(sort=True)
+        if self.docker_manager.selected_container is not None:
+            self.select(self.docker_manager.selected_container.name)
+
+    def rebuild(self, sort: bool = False) -> None:
+        """Update the rows after containers were added to or removed from the
+        registry, keeping the current order and appending new containers.
+
+        Args:
+            sort: Order the rows by status instead, running containers first.
+        """
+        selected = self.rows[self.selected] if self.rows else None
+        known = [entry for entry in self.rows if entry.row is not None]
+        known_ids = {entry.id for entry in known}
+        self.rows = known + [
+            entry
+            for entry in self.docker_manager.containers
+            if entry.id not in known_ids
+        ]
+        if sort:
+            self.rows.sort(key=lambda entry: entry.status != "running")
+        for row, entry in enumerate(self.rows):
+            entry.row = row
+
+        if selected is not None and selected.row is not None:
+            self.selected = selected.row
+        else:
+            self.selected = min(self.selected, max(len(self.rows) - 1, 0))
+        self.virtual_size = Size(
+            max((len(entry.name) for entry in self.rows), default=0) + 2,
+            len(self.rows),
+        )
+        self._line_cache.clear()
+        self.refresh()
+
+    def refresh_row(self, row: int | None) -> None:
+        if row is None:
+            return
+        self._line_cache.clear()
+        self.refresh_lines(row - self.scroll_offset.y)
+
+    def select(self, name: str) -> None:
+        """Select the row of `name` without notifying anyone."""
+        entry = self.docker_manager.containers.get(name)
+        if entry is not None and entry.row is not None:
+            self._move(entry.row)
+
+    def _move(self, row: int) -> None:
+        previous, self.selected = self.selected, row
+        self.refresh_row(previous)
+        self.refresh_row(row)
+        self.scroll_to_region(Region(0, row, 1, 1), animate=False)
+
+    def _select_row(self, row: int) -> None:
+        if not self.rows:
+            return
+        row = max(0, min(row, len(self.rows) - 1))
+        changed = row != self.selected
+        self._move(row)
+        if changed:
+            self.post_message(ClickedContainer(self.rows[row].name))
+
+    def action_cursor_down(self) -> None:
+        self._select_row(self.selected + 1)
+
+    def action_cursor_up(self) -> None:
+        self._select_row(self.selected - 1)
+
+    def action_select_cursor(self) -> None:
+        if self.rows:
+            self.post_message(ClickedContainer(self.rows[self.selected].name))
+
+    def on_click(self, event: events.Click) -> None:
+        row = event.y + self.scroll_offset.y
+        if 0 <= row < len(self.rows):
+            self._select_row(row)
+
+    def notify_style_update(self) -> None:
+        self._line_cache.clear()
+
+    def render_line(self, y: int) -> Strip:
+        scroll_x, scroll_y = self.scroll_offset
+        row = scroll_y + y
+        width = self.size.width
+        key = (row, scroll_x, width)
+        if key in self._line_cache:
+            return self._line_cache[key]
+
+        if row >= len(self.rows):
+            strip = Strip.blank(width, self.rich_style)
+        else:
+            entry = self.rows[row]
+            style = self.rich_style
+            if entry.status in ("running", "down"):
+                style += self.get_component_rich_style(f"containerlist--{entry.status}")
+            if row == self.selected:
+                style += self.get_component_rich_style("containerlist--selected")
+            strip = Strip([Segment(f" {entry.name}", style)]).crop_extend(
+                scroll_x, scroll_x + width, style
+            )
+        self._line_cache[key] = strip
+        return strip
+
+
 class PockerContainers(Widget):
     BORDER_TITLE: str = "Containers"
     _containers_and_images_maximized = False
@@ -25,155 +184,127 @@ class PockerContainers(Widget):
         disabled: bool = False,
     ) -> None:
         self.docker_manager = docker_manager
+        self._events: deque[ContainerEvent] = deque()
         super().__init__(
             *children, name=name, id=id, classes=classes, disabled=disabled
         )
 
     def compose(self) -> ComposeResult:
-        self.list_view = ListView(id="ContainersAndImagesListView")
-
-        with self.list_view:
-            container: Container
-            for name, container in self.docker_manager.containers.items():
-                yield self._add_new_list_view_container(name, container)
-
-    def _add_new_list_view_container(self, name: str, container: Container):
-        start_btn = Button(
-            "Start",
-            id="start-container-btn",
-            tooltip="Start container.\n\n[b yellow][?][/b yellow] No effect if running.",
-        )
-        stop_btn = Button(
-            "Stop",
-            id="stop-container-btn",
-            tooltip="Stop container.\n\n[b yellow][?][/b yellow] No effect if exited.",
-        )
-        restart_container_btn = Button(
-            "Restart", id="restart-container-btn", tooltip="Restart container."
+        self.container_list = ContainerList(
+            id="ContainersList", docker_manager=self.docker_manager
         )
-        remove_container_btn = Button(
-            "Remove",
-            id="remove-container-btn",
-            tooltip="Remove container.\n\n[b yellow][?][/b yellow] Container must be exited before removed.",
-        )
-        container_name_label = Label(name)
-
-        list_item = ListItem(
-            Horizontal(
-                container_name_label,
-                start_btn,
-                stop_btn,
-                restart_container_btn,
-                remove_container_btn,
+        yield self.container_list
+        # One set of actions, acting on the selected container.
+        yield Horizontal(
+            Button(
+                "Start",
+                id="start-container-btn",
+                tooltip="Start container.\n\n[b yellow][?][/b yellow] No effect if running.",
+            ),
+            Button(
+                "Stop",
+                id="stop-container-btn",
+                tooltip="Stop container.\n\n[b yellow][?][/b yellow] No effect if exited.",
+            ),
+            Button("Restart", id="restart-container-btn", tooltip="Restart container."),
+            Button(
+                "Remove",
+                id="remove-container-btn",
+                tooltip="Remove container.\n\n[b yellow][?][/b yellow] Container must be exited before removed.",
             ),
-            id=name,
-            classes=f"{self.docker_manager.status(container)}",
+            id="container-actions",
         )
 
-        if self._containers_and_images_maximized:
-            list_item.add_class("expanded-container")
+    EVENTS_INTERVAL = 1 / 30
+    """Seconds between applying the docker events received in the meantime."""
 
-        return list_item
-
-    def on_list_view_selected(self, selected: ListView.Selected):
-        if selected.item != self.query_one(".selected"):
-            self.post_message(ClickedContainer(selected.item))
-
-    async def on_mount(self) -> None:
-        self.list_view.children[0].add_class("selected")
-        self.list_view.sort_children(
-            key=lambda listview_container: listview_container.has_class("running"),
-            reverse=True,
-        )
+    def on_mount(self) -> None:
+        self.set_interval(self.EVENTS_INTERVAL, self._apply_events)
 
     @on(ClickedContainer)
     def _update_selected_container(self, new_selected_container: ClickedContainer):
-        selected_container = new_selected_container.clicked_container
-        containers = self.query_one(ListView)
-        container: ListItem
-        for container in containers.children:
-            if container.has_class("selected"):
-                container.remove_class("selected")
-
-        selected_container.add_class("selected")
-        self.docker_manager.selected_container = self.docker_manager.containers.get(
-            str(selected_container.id)
+        entry = self.docker_manager.containers.get(
+            new_selected_container.clicked_container
         )
+        if entry is not None:
+            self.docker_manager.selected_container = entry.container
 
-    def on_key(self, event: events.Key) -> None:
-        list_view: ListView = self.query_one(ListView)
-        if event.key == "j":
-            list_view.action_cursor_down()
-        if event.key == "k":
-            list_view.action_cursor_up()
-
-        list_view.action_select_cursor()
-
-    async def _validate_if_any_container_selected(self):
-        for child in self.list_view.walk_children():
-            if child.has_class("selected"):
-                return
-
-        first_child = self.list_view.query()[0]
-        first_child.add_class("selected")
-
-    def live_status_events_task(self, loop: asyncio.AbstractEventLoop):
-        try:
-            event: dict[str, str]
-            for event in self.docker_manager.client.events(decode=True):
-                if event["Type"] == "container":
-                    container_name = event.get("Actor").get("Attributes").get("name")
-                    match event["status"]:
-                        case "start":
-                            asyncio.run_coroutine_threadsafe(
-                                self._container_started(container_name), loop
-                            )
-                        case "stop":
-                            asyncio.run_coroutine_threadsafe(
-                                self._container_status_changed(
-                                    container_name, "stopping"
-                                ),
-                                loop,
-                            )
-                        case "die":
-                            asyncio.run_coroutine_threadsafe(
-                                self._container_status_changed(container_name, "down"),
-                                loop,
-                            )
-                        case "destroy":
-                            asyncio.run_coroutine_threadsafe(
-                                self._container_destroyed(container_name), loop
-                            )
-        except Exception as e:
-            print(f"Error in live status events task: {e}")
-
-    async def _container_started(self, container_name: str):
-        for child in self.list_view.walk_children():
-            if child.id == container_name:
-                child.remove_class("down")
-                child.set_class(True, "running")
-                await self._validate_if_any_container_selected()
-                return
-
-        self.docker_manager.append_container(container_name)
-        container = self.docker_manager.containers.get(container_name)
-        await self.list_view.append(
-            self._add_new_list_view_container(container_name, container)
+    def live_status_events_task(self):
+        self.docker_manager.supervisor.spawn(
+            "events", self._follow_events, restart="always"
         )
-        await self._validate_if_any_container_selected()
 
-    async def _container_status_changed(self, container_name: str, status: str):
-        container_list_item: ListItem = self.list_view.get_child_by_id(container_name)
-        was_selected: bool = container_list_item.has_class("selected")
+    async def _follow_events(self):
+        """Queue container events, to be applied in batches by `_apply_events`."""
+        event: dict[str, Any]
+        async for event in self.docker_manager.events():
+            action = event.get("Action") or event.get("status", "")
+            actor = event.get("Actor", {})
+            container_id = actor.get("ID") or event.get("id")
+            name = actor.get("Attributes", {}).get("name")
+            # Any event may change what inspecting the container returns.
+            self.docker_manager.invalidate_inspect(container_id)
+            container = None
+            if action == "start" and container_id not in self.docker_manager.containers:
+                container = await self.docker_manager.get_container(container_id)
+            self._events.append(ContainerEvent(action, container_id, name, container))
+
+    def _apply_events(self) -> None:
+        if not self._events:
+            return
+        registry = self.docker_manager.containers
+        changed_rows: set[int | None] = set()
+        rebuild = False
+
+        while self._events:
+            action, container_id, name, container = self._events.popleft()
+            entry = registry.get(container_id)
+            match action:
+                case "start":
+                    self.docker_manager.log_cache.container_started(container_id)
+                    if entry is not None:
+                        entry.status = "running"
+                        changed_rows.add(entry.row)
+                    elif container is not None:
+                        registry.add(container, "running")
+                        rebuild = True
+                case "stop":
+                    if entry is not None:
+                        entry.status = "stopping"
+                        changed_rows.add(entry.row)
+                case "die":
+                    if entry is not None:
+                        entry.status = "down"
+                        changed_rows.add(entry.row)
+                case "rename":
+                    if entry is not None and name:
+                        registry.rename(container_id, name)
+                        changed_rows.add(entry.row)
+                case "destroy":
+                    if entry is not None:
+                        self._container_destroyed(entry)
+                        rebuild = True
 
-        container_list_item.add_class(status)
-        if was_selected:
-            container_list_item.add_class("selected")
+        if rebuild:
+            self.container_list.rebuild()
+        else:
+            for row in changed_rows:
+                self.container_list.refresh_row(row)
 
-    async def _container_destroyed(self, container_name: str):
-        for x in self.list_view.walk_children():
-            if x.id == container_name:
-                self.list_view.remove_children(f"#{container_name}")
-                break
+    def containers_reconciled(self, removed: list[ContainerEntry]):
+        """Show the containers after the registry was reconciled with the daemon,
+        selecting another container if the selected one no longer exists."""
+        for entry in removed:
+            self._container_destroyed(entry)
+        self.container_list.rebuild(sort=True)
+        if (
+            self.docker_manager.selected_container.id
+            not in self.docker_manager.containers
+        ):
+            self.container_list.action_select_cursor()
 
-        await self._validate_if_any_container_selected()
+    def _container_destroyed(self, entry: ContainerEntry):
+        self.docker_manager.containers.remove(entry.id)
+        entry.row = None
+        self.docker_manager.log_cache.discard(entry.id)
+        self.docker_manager.stats_monitor.discard(entry.id)
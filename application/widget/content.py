@@ -1,9 +1,9 @@
 import re
 import time
-from threading import Event, Thread
-from typing import Any
+from collections.abc import Sequence
 
-from textual import on
+from docker.models.containers import Container
+from textual import on, work
 from textual.app import ComposeResult
 from textual.containers import Horizontal
 from textual.widget import Widget
@@ -14,18 +14,28 @@ from textual.widgets import (
     TabbedContent,
     TabPane,
 )
+from textual.worker import get_current_worker
 
 from application.docker_manager import DockerManager
+from application.util.container_stats import ContainerStats, format_bytes
+from application.util.search_index import scan
+from application.util.structured_log import parse_filters
+from application.util.time_series import TimeSeries
 from application.widget.log_viewer import LogLines
 from application.widget.shell import ShellPane
-from application.widget.statistics import Statistics
 
 
 class ContentWindow(Widget):
+    SEARCH_CHUNK_SIZE = 5000
+    JUMP_TIMEOUT = 10.0
+    """Seconds to wait for the line of `search_for_line` to be written."""
+    STATISTICS_INTERVAL = 0.5
+    STATISTICS_HISTORY = 3600
+    """Number of samples plotted, an hour of docker's one second samples."""
     current_list_index = None
     search_keyword = ""
-    matches, indices = None, None
-    log_task_stop_event = Event()
+    indices = None
+    current_content_window: LogLines | None = None
 
     def __init__(
         self,
@@ -37,10 +47,20 @@ class ContentWindow(Widget):
         disabled: bool = False,
     ) -> None:
         self.docker_manager = docker_manager
+        self._statistics_container: Container | None = None
+        self._statistics_read: str | None = None
+        self._statistics_subtitle = ""
+        self._cpu_series = TimeSeries(self.STATISTICS_HISTORY)
+        self._memory_series = TimeSeries(self.STATISTICS_HISTORY)
+        self._jump_target: tuple[str, str, float] | None = None
+        """Keyword, text of the line to select once it matches, and deadline."""
         super().__init__(
             *children, name=name, id=id, classes=classes, disabled=disabled
         )
 
+    def on_mount(self) -> None:
+        self.set_interval(self.STATISTICS_INTERVAL, self._refresh_statistics)
+
     def compose(self) -> ComposeResult:
         global logs
 
@@ -80,9 +100,7 @@ class ContentWindow(Widget):
                 environment.scroll_end(animate=False)
                 yield environment
             with TabPane("Statistics", id="statisticspane"):
-                yield Statistics(label="CPU (%)", id="statistics_plot_cpu")
-                yield Statistics(label="RAM (MB)", id="statistics_plot_memory")
-
+                # The plots are added by `show_statistics_plots`.
                 statistics = LogLines(
                     id="statistics_log",
                     highlight=True,
@@ -95,53 +113,186 @@ class ContentWindow(Widget):
             yield ShellPane(
                 title="Shell", id="shellpane", docker_manager=self.docker_manager
             )
+            # The overview is added by `show_overview`.
+            yield TabPane("Overview", id="overviewpane")
+
+    def show_statistics_plots(self) -> None:
+        """Add the plots the first time the statistics are shown, so plotext is
+        only imported then. Samples are recorded from the start regardless."""
+        if self.query("#statistics_plot_cpu"):
+            return
+        from application.widget.statistics import Statistics
+
+        self.query_one("#statisticspane").mount(
+            Statistics("CPU (%)", self._cpu_series, id="statistics_plot_cpu"),
+            Statistics("RAM (MB)", self._memory_series, id="statistics_plot_memory"),
+            before="#statistics_log",
+        )
+
+    def show_overview(self) -> Widget:
+        """The overview of all containers, added the first time it is shown."""
+        overviews = self.query("#container_overview")
+        if overviews:
+            return overviews.first()
+        from application.widget.overview import ContainerOverview
+
+        overview = ContainerOverview(
+            id="container_overview", docker_manager=self.docker_manager
+        )
+        self.query_one("#overviewpane").mount(overview)
+        return overview
 
     def search_logs(self, pattern):
         case_sensitive_switch = self.query_one("#case-sensitive-switch", Switch).value
         case_sensitive = 0 if case_sensitive_switch else re.IGNORECASE
-        compiled_pattern = re.compile(pattern, case_sensitive)
 
         current_tab = self.query_one(TabbedContent).active
         self.current_content_window: LogLines = self.query_one(
             f"#{current_tab}"
         ).children[0]
-        results = [
-            (line, i)
-            for i, line in enumerate(self.current_content_window.lines)
-            if compiled_pattern.search(line.text)
-        ]
-
-        if results:
-            self.matches, self.indices = zip(*results)
-            self.matches = list(self.matches)
-            self.indices = list(self.indices)
-        else:
-            self.matches = []
-            self.indices = []
+        log_lines = self.current_content_window
+        log_lines.current_index = None
+        search_index = log_lines.search_index
+        filters = parse_filters(pattern) if log_lines.structured else None
+        if filters is not None:
+            # Filters are tested against the parsed records, no scan needed.
+            matches = log_lines.records.matching(filters)
+            search_index.begin_filtered(pattern, filters, matches)
+            self.indices = search_index
+            log_lines.refresh_grep_view()
+            return
+        numbers, texts = search_index.begin(pattern, case_sensitive, log_lines.lines)
+        self.indices = search_index
+        log_lines.refresh_grep_view()
+        self._scan_logs(
+            log_lines, search_index.pattern, search_index.generation, numbers, texts
+        )
+
+    @work(thread=True, exclusive=True, group="search")
+    def _scan_logs(
+        self,
+        log_lines: LogLines,
+        pattern: re.Pattern[str],
+        generation: int,
+        numbers: Sequence[int],
+        texts: list[str],
+    ) -> None:
+        """Scan the lines in chunks, newest first, so the first hits show up at once.
+
+        The `pattern` is the one the search began with: the index's own is reset
+        when the search is cleared or replaced while scanning.
+        """
+        worker = get_current_worker()
+        for end in range(len(texts), 0, -self.SEARCH_CHUNK_SIZE):
+            if worker.is_cancelled:
+                return
+            start = max(0, end - self.SEARCH_CHUNK_SIZE)
+            matches = scan(pattern, numbers[start:end], texts[start:end])
+            self.app.call_from_thread(
+                self._merge_search_results, log_lines, generation, matches
+            )
+        self.app.call_from_thread(self._finish_search, log_lines, generation)
+
+    def _merge_search_results(
+        self, log_lines: LogLines, generation: int, matches: list[int]
+    ) -> None:
+        merged = log_lines.search_index.merge(
+            generation, matches, log_lines.lines.start
+        )
+        if merged and matches:
+            log_lines.refresh_grep_view()
+            self._refresh_search_matches(log_lines)
+
+    def _finish_search(self, log_lines: LogLines, generation: int) -> None:
+        log_lines.search_index.finish(generation)
+        self._refresh_search_matches(log_lines)
 
     @on(Input.Changed)
     def input_changed(self, input=Input()) -> None:
-        if self._shell_tab_active():
-            return  # No text to look for when inside shell
+        if self._unsearchable_tab_active():
+            return  # No text to look for when inside shell or overview
 
         keyword = input.value
         self._update_case_sensitivity()
 
         if not keyword or keyword != self.search_keyword:
             self._reset_search_state()
+        if not keyword:
+            self.workers.cancel_group(self, "search")
+            if self.current_content_window is not None:
+                self.current_content_window.search_index.clear()
+                self.current_content_window.refresh_grep_view()
+            self._show_no_results()
+            return
 
-        if self.current_list_index is None and keyword:
+        if self.current_list_index is None:
             self._perform_search(keyword)
 
-        if self.indices:
-            self._update_input_display(keyword)
-        else:
-            self._show_no_results()
+    @on(LogLines.MatchesChanged)
+    def _matches_changed(self, event: LogLines.MatchesChanged) -> None:
+        """Keep the match counter live while lines stream in and get evicted."""
+        self._refresh_search_matches(event.log_lines)
+
+    def _refresh_search_matches(self, log_lines: LogLines) -> None:
+        if log_lines is not self.current_content_window or not self.search_keyword:
+            return
+        if not self.indices:
+            if log_lines.search_index.scanning:
+                self.query_one("#search_log_input").border_title = "Searching..."
+            else:
+                self._show_no_results()
+            return
+
+        if self._jump_target is not None and self._jump_to_target(log_lines):
+            return
+
+        if log_lines.current_index is None:
+            # First match(es) of a search that had none, jump to the latest.
+            self.current_list_index = len(self.indices) - 1
+            self._update_input_display(self.search_keyword)
+            return
+
+        self.current_list_index = min(
+            self.indices.position(log_lines.current_index), len(self.indices) - 1
+        )
+        self.update_input_border()
+
+    def search_for_line(self, keyword: str, case_sensitive: bool, text: str) -> None:
+        """Search the logs for `keyword` and select the match logged as `text`,
+        i.e a line found by searching every container's logs. Until the line is
+        written, e.g while the container's logs are fetched, the latest match
+        is selected."""
+        self._jump_target = (keyword, text, time.monotonic() + self.JUMP_TIMEOUT)
+        self.query_one("#case-sensitive-switch", Switch).value = case_sensitive
+        search_input = self.query_one("#search_log_input", Input)
+        if search_input.value != keyword:
+            search_input.value = keyword  # Searches once the input has changed.
+        elif self.current_content_window is not None:
+            self._refresh_search_matches(self.current_content_window)
+
+    def _jump_to_target(self, log_lines: LogLines) -> bool:
+        """Select the match of `search_for_line`, if it was written by now."""
+        keyword, text, deadline = self._jump_target
+        if time.monotonic() > deadline:
+            self._jump_target = None
+            return False
+        if keyword != self.search_keyword:
+            return False  # The search for it hasn't started yet.
+        for position in range(len(self.indices) - 1, -1, -1):
+            if log_lines.lines.get(self.indices[position]).source == text:
+                self._jump_target = None
+                self.current_list_index = position
+                self._update_input_display(keyword)
+                return True
+        return False
 
     @on(Input.Submitted)
     def input_submitted(self, input=Input()) -> None:
-        if self._shell_tab_active():
-            return  # No text to look for when inside shell
+        if self._unsearchable_tab_active():
+            return  # No text to look for when inside shell or overview
+
+        if not self.indices:
+            return  # Nothing found (yet)
 
         keyword = input.value
         self._update_case_sensitivity()
@@ -158,9 +309,9 @@ class ContentWindow(Widget):
         self.indices = []
 
     def _perform_search(self, keyword: str) -> None:
-        self.search_logs(keyword)
         self.search_keyword = keyword
-        self.current_list_index = len(self.indices) - 1
+        self.search_logs(keyword)
+        self._refresh_search_matches(self.current_content_window)
 
     def _update_input_display(self, keyword: str) -> None:
         try:
@@ -168,9 +319,7 @@ class ContentWindow(Widget):
         except IndexError:
             return  # No matches, don't update
 
-        self.current_content_window.scroll_to(
-            y=self._get_indices_list_value(), animate=False, duration=0
-        )
+        self.current_content_window.scroll_to_line(self._get_indices_list_value())
         self.current_content_window.keyword = keyword
         self.current_content_window.current_index = self._get_indices_list_value()
         self.current_content_window.refresh()  # Force refresh, just to get rid of slow visual changes.
@@ -196,55 +345,74 @@ class ContentWindow(Widget):
         input.border_subtitle = f"line {line}"
 
     def live_logs_task(self):
-        self.docker_manager.live_container_logs(logs, self.log_task_stop_event)
+        self.docker_manager.log_cache.open(self.docker_manager.selected_container)
 
     def run_log_task(self):
-        self.log_task_stop_event.set()  # Signal any existing task to stop
-        self.log_task_stop_event = Event()  # Create a new stop event for the new task
-        Thread(target=self.live_logs_task, daemon=True).start()
+        """Swap in the log session of the selected container, following its logs.
 
-    def live_statistics_task(self):
-        stop_event = Event()
-
-        while not stop_event.is_set():
-            try:
-                stats = self._fetch_container_stats()
-                cpu, memory = self._parse_stats(stats)
-                self._update_plots_if_visible(cpu, memory)
-                self._update_logs(cpu, memory)
-            except Exception:
-                stop_event.set()
-                self.live_logs_task()
-
-    def _fetch_container_stats(self):
-        return self.docker_manager.selected_container.stats(stream=False)
-
-    def _parse_stats(self, stats: dict[Any, Any]):
-        try:
-            cpu_usage = (
-                stats["cpu_stats"]["cpu_usage"]["total_usage"]
-                / stats["cpu_stats"]["system_cpu_usage"]
-            )
-            memory_usage_mb = stats["memory_stats"]["usage"] / (1024 * 1024)
-            cpu = f"{cpu_usage * 100:.3f}%"
-            memory = f"{memory_usage_mb:.3f} MB"
-            return cpu, memory
-        except KeyError:
-            # TODO: Correctly handle this case.
-            return "N/A", "N/A"
-
-    def _update_plots_if_visible(self, cpu: str, memory: str):
-        if self.query_one(TabbedContent).active == "statisticspane":
-            cpu = float(cpu.replace("%", ""))
-            memory = float(memory.replace("MB", ""))
-            current_time = time.strftime("%M:%S")
-            self.query_one("#statistics_plot_cpu", Statistics).update(cpu, current_time)
-            self.query_one("#statistics_plot_memory", Statistics).update(
-                memory, current_time
-            )
+        Lines of a recently viewed container are still cached, so only lines
+        logged since it was last followed are fetched.
+        """
+        session = self.docker_manager.log_cache.open(
+            self.docker_manager.selected_container
+        )
+        logs.attach_ingest(session, session.lines)
+        if self.search_keyword:
+            # The previous container's matches don't apply, search this one.
+            keyword = self.search_keyword
+            self._reset_search_state()
+            self._perform_search(keyword)
 
-    def _update_logs(self, cpu: str, memory: str):
-        logs.border_subtitle = f"cpu: {cpu} | ram: {memory} | logs: {len(logs.lines)}"
+    def live_statistics_task(self):
+        """Stream the stats of the selected container, instead of the previous one."""
+        container = self.docker_manager.selected_container
+        if self._statistics_container is not None:
+            if self._statistics_container.id == container.id:
+                return
+            self.docker_manager.stats_monitor.unwatch(self._statistics_container.id)
+        self._statistics_container = container
+        self._statistics_read = None
+        self._statistics_subtitle = ""
+        self._cpu_series.clear()
+        self._memory_series.clear()
+        self._replot_statistics()
+        self.docker_manager.stats_monitor.watch(container)
+
+    def _refresh_statistics(self) -> None:
+        self._refresh_logs_subtitle()
+        if self._statistics_container is None:
+            return
+        stats = self.docker_manager.stats_monitor.latest(self._statistics_container.id)
+        if stats is None or stats.read == self._statistics_read:
+            return  # No new sample yet
+        self._statistics_read = stats.read
+        self._update_plots(stats)
+        self._statistics_subtitle = (
+            f"cpu: {stats.cpu_percent:.2f}% | ram: {stats.memory_mb:.1f} MB"
+            f" | net: {format_bytes(stats.net_rx)} / {format_bytes(stats.net_tx)}"
+            f" | block: {format_bytes(stats.block_read)} / {format_bytes(stats.block_write)}"
+            f" | pids: {stats.pids}"
+        )
 
-    def _shell_tab_active(self):
-        return self.query_one(TabbedContent).active == "shellpane"
+    def _update_plots(self, stats: ContainerStats):
+        """Record the sample, redrawing the plots only while they are visible."""
+        now = time.time()
+        self._cpu_series.append(now, stats.cpu_percent)
+        self._memory_series.append(now, stats.memory_mb)
+        if self.query_one(TabbedContent).active == "statisticspane":
+            self._replot_statistics()
+
+    def _replot_statistics(self) -> None:
+        for plot in self.query("#statisticspane Statistics"):
+            plot.replot()
+
+    def _refresh_logs_subtitle(self) -> None:
+        """Show the statistics, and the log's size and ingest rate, under the log."""
+        parts = [self._statistics_subtitle] if self._statistics_subtitle else []
+        parts.append(f"logs: {len(logs.lines)}")
+        if flood := logs.flood_guard.summary():
+            parts.append(flood)
+        logs.border_subtitle = " | ".join(parts)
+
+    def _unsearchable_tab_active(self):
+        return self.query_one(TabbedContent).active in ("shellpane", "overviewpane")
@@ -1,4 +1,6 @@
+import time
 import webbrowser
+from collections import Counter
 
 import requests
 from rich.text import Text
@@ -8,6 +10,7 @@ from textual.containers import Center, VerticalScroll
 from textual.screen import ModalScreen
 from textual.widgets import Markdown, Static
 
+from application.task_supervisor import TaskSupervisor
 from application.util.helper import POCKER_CONFIG_BASE_PATH, get_current_version
 
 HELP_MD = """
@@ -30,7 +33,11 @@ Author: [pommee](https://github.com/pommee)
 - `e` show container environment variables.
 - `f` display content window in full-size.
 - `v` shell in the container.
+- `o` overview of the resource usage of all containers.
 - `w` will wrap logs/attributes to avoid horizontal scrolling.
+- `t` shows JSON logs as columns, searchable with filters like `level>=warn`.
+- `g` shows only the log lines matching the search.
+- `G` searches the logs of all containers.
 
 ### Other keys
 
@@ -71,6 +78,13 @@ class HelpScreen(ModalScreen):
             with Center():
                 yield Static(get_title(), id="title", classes="title")
             yield Markdown(HELP_MD, id="help", classes="help")
+            docker_manager = getattr(self.app, "docker_manager", None)
+            if docker_manager is not None:
+                yield Markdown(
+                    self._task_status(docker_manager.supervisor),
+                    id="task-status",
+                    classes="help",
+                )
             yield Markdown(self._read_changelog(), id="changelog", classes="changelog")
 
     @on(Markdown.LinkClicked)
@@ -80,6 +94,24 @@ class HelpScreen(ModalScreen):
     def action_go(self, href: str) -> None:
         webbrowser.open(href)
 
+    def _task_status(self, supervisor: TaskSupervisor) -> str:
+        states = Counter(status.state for status in supervisor.status())
+        lines = [
+            "### Background tasks",
+            "",
+            ", ".join(f"{count} {state}" for state, count in sorted(states.items()))
+            or "No tasks.",
+        ]
+        if supervisor.failures:
+            lines += ["", "Recent failures:", ""]
+            for status in reversed(supervisor.failures):
+                at = time.strftime("%H:%M:%S", time.localtime(status.changed_at))
+                lines.append(
+                    f"- `{at}` {status.name} ({status.state},"
+                    f" {status.restarts} restarts): {status.error}"
+                )
+        return "\n".join(lines) + "\n"
+
     def _read_changelog(self):
         file_path = POCKER_CONFIG_BASE_PATH / "CHANGELOG.md"
         if not file_path.exists():
@@ -32,13 +32,23 @@ class PockerImages(Widget):
         )
 
     def compose(self) -> ComposeResult:
-        with ListView(id="ContainersAndImagesListView"):
-            image: Image
-            for image in self.docker_manager.images:
-                if image.tags:
-                    name = image.tags[0].split(":")[0]
-                    version = image.tags[0].split(":")[1]
-                    yield ListItem(Label(f"{name}:{version}"))
+        yield ListView(*self._image_items(), id="ContainersAndImagesListView")
+
+    def refresh_images(self) -> None:
+        """Show the docker manager's images again, e.g after they were reloaded."""
+        images = self.query_one(ListView)
+        images.clear()
+        images.extend(self._image_items())
+
+    def _image_items(self) -> list[ListItem]:
+        items = []
+        image: Image
+        for image in self.docker_manager.images:
+            if image.tags:
+                name = image.tags[0].split(":")[0]
+                version = image.tags[0].split(":")[1]
+                items.append(ListItem(Label(f"{name}:{version}")))
+        return items
 
     @dataclass
     class ClickedImage(Message, bubble=True):
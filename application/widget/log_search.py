@@ -0,0 +1,127 @@
+import re
+from fnmatch import fnmatch
+from typing import ClassVar, NamedTuple
+
+from rich.text import Text
+from textual import on, work
+from textual.app import ComposeResult
+from textual.binding import BindingType
+from textual.containers import Horizontal, Vertical
+from textual.screen import ModalScreen
+from textual.widgets import Input, Static, Switch, Tree
+
+from application.docker_manager import DockerManager
+from application.log_search import ContainerHits
+from application.util.log_flood import format_count
+from application.util.log_search import LogHit
+
+
+class LogSearchResult(NamedTuple):
+    """The line picked among the results, to open its container at."""
+
+    container: str
+    keyword: str
+    case_sensitive: bool
+    hit: LogHit
+
+
+class LogSearchScreen(ModalScreen[LogSearchResult | None]):
+    """Searches the logs of every container, or of the containers whose name
+    matches a pattern, listing the matching lines grouped by container."""
+
+    BINDINGS: ClassVar[list[BindingType]] = [
+        ("escape", "dismiss"),
+    ]
+
+    def __init__(self, docker_manager: DockerManager) -> None:
+        super().__init__()
+        self.docker_manager = docker_manager
+        self._keyword = ""
+        self._case_sensitive = False
+
+    def compose(self) -> ComposeResult:
+        with Vertical():
+            with Horizontal(classes="log-search-inputs"):
+                yield Input(
+                    id="log-search-keyword", placeholder="Search all logs for..."
+                )
+                yield Input(
+                    id="log-search-containers",
+                    placeholder="in containers, e.g api-* (all if empty)",
+                )
+                yield Static("case-sensitive", classes="label")
+                yield Switch(id="log-search-case-sensitive", animate=True)
+            tree: Tree[str | LogHit] = Tree("Results", id="log-search-results")
+            tree.show_root = False
+            tree.border_title = "Results"
+            yield tree
+
+    def on_mount(self) -> None:
+        self.query_one("#log-search-keyword", Input).focus()
+
+    @on(Input.Submitted)
+    def _start_search(self) -> None:
+        keyword = self.query_one("#log-search-keyword", Input).value
+        if not keyword:
+            return
+        pattern = self.query_one("#log-search-containers", Input).value.strip()
+        self._keyword = keyword
+        self._case_sensitive = self.query_one(
+            "#log-search-case-sensitive", Switch
+        ).value
+        self._search(keyword, self._case_sensitive, pattern or "*")
+        self.query_one("#log-search-results", Tree).focus()
+
+    @work(exclusive=True, group="log-search")
+    async def _search(self, keyword: str, case_sensitive: bool, pattern: str) -> None:
+        containers = [
+            entry.container
+            for entry in self.docker_manager.containers
+            if fnmatch(entry.name, pattern)
+        ]
+        tree = self.query_one("#log-search-results", Tree)
+        tree.clear()
+        tree.border_subtitle = f"0/{len(containers)} containers"
+        flags = 0 if case_sensitive else re.IGNORECASE
+        searched = matched = hits = 0
+        async for result in self.docker_manager.log_search.search(
+            containers, keyword, flags, self.docker_manager.config.log_tail
+        ):
+            searched += 1
+            if result.count or result.error:
+                matched += bool(result.count)
+                hits += result.count
+                self._add_result(tree, result)
+            tree.border_subtitle = (
+                f"{searched}/{len(containers)} containers"
+                f" | {format_count(hits)} hits in {matched}"
+            )
+        tree.border_title = f"Results for {keyword!r}"
+
+    def _add_result(self, tree: Tree, result: ContainerHits) -> None:
+        if result.error is not None:
+            label = Text.assemble(result.name, (f"  {result.error}", "red"))
+            tree.root.add_leaf(label, data=result.name)
+            return
+
+        label = Text.assemble(result.name, (f"  {result.count}", "bold"))
+        node = tree.root.add(label, data=result.name)
+        left_out = result.count - len(result.hits)
+        if left_out:
+            node.add_leaf(Text(f"{left_out} older matches not shown", "dim"))
+        for hit in result.hits:
+            timestamp = hit.timestamp[:19].replace("T", " ")
+            node.add_leaf(
+                Text.assemble((timestamp, "log.time"), " ", hit.text), data=hit
+            )
+
+    @on(Tree.NodeSelected)
+    def _open_hit(self, event: Tree.NodeSelected) -> None:
+        hit = event.node.data
+        if not isinstance(hit, LogHit):
+            return
+        self.dismiss(
+            LogSearchResult(
+                event.node.parent.data, self._keyword, self._case_sensitive, hit
+            )
+        )
@@ -1,37 +1,195 @@
 from __future__ import annotations
 
 import re
+from bisect import bisect_right
+from collections.abc import Iterable
+from dataclasses import dataclass
 from typing import TYPE_CHECKING, Optional, cast
 
-from rich.console import RenderableType
-from rich.highlighter import Highlighter, ReprHighlighter
-from rich.measure import measure_renderables
+from rich.cells import cell_len
+from rich.console import Console, RenderableType
+from rich.highlighter import Highlighter
 from rich.pretty import Pretty
 from rich.protocol import is_renderable
-from rich.segment import Segment
+from rich.style import Style
 from rich.text import Text
+from textual import work
 from textual.cache import LRUCache
 from textual.geometry import Region, Size
+from textual.message import Message
 from textual.reactive import var
 from textual.scroll_view import ScrollView
 from textual.strip import Strip
 
+from application.util.grep_view import GrepView
+from application.util.log_flood import FloodGuard, Run
+from application.util.log_highlighter import LogHighlighter
+from application.util.log_ingest import LogIngest
+from application.util.log_stream import STDERR, STDOUT, StreamLine
+from application.util.ring_buffer import RingBuffer
+from application.util.search_index import SearchIndex, compile_search
+from application.util.structured_log import (
+    FieldFilter,
+    LogRecords,
+    Record,
+    parse_filters,
+    parse_record,
+    parse_records,
+    render_record,
+)
+
 if TYPE_CHECKING:
     from typing_extensions import Self
 
 
+class LogLine:
+    """A line of the log, styled once when written.
+
+    The line is stored independent of the widget's width; its strip is rendered
+    the first time the line becomes visible. A line given as plain text only
+    becomes `Text` then too, which keeps writing floods of lines cheap. Search
+    matches and the search highlighted strip are cached per search generation,
+    so repainting a line doesn't re-run the search pattern.
+    """
+
+    __slots__ = (
+        "_content",
+        "_highlighted",
+        "_highlighted_key",
+        "_spans",
+        "_spans_generation",
+        "_strip",
+        "_style",
+        "cell_len",
+        "raw",
+        "stream",
+        "text",
+    )
+
+    def __init__(
+        self, content: Text | str, stream: int = STDOUT, style: Style | None = None
+    ) -> None:
+        if isinstance(content, str):
+            self._content = None
+            self.text = content
+            self.cell_len = (
+                len(content)
+                if content.isascii() and content.isprintable()
+                else cell_len(content)
+            )
+        else:
+            self._content = content
+            self.text = content.plain
+            self.cell_len = content.cell_len
+        self._style = style
+        self.stream = stream
+        self.raw: str | None = None
+        """The line as logged, when shown otherwise, i.e as structured columns."""
+        self._strip: Strip | None = None
+        self._spans: tuple[tuple[int, int], ...] = ()
+        self._spans_generation = -1
+        self._highlighted: Strip | None = None
+        self._highlighted_key: tuple[int, bool] | None = None
+
+    @property
+    def source(self) -> str:
+        return self.text if self.raw is None else self.raw
+
+    @property
+    def content(self) -> Text:
+        if self._content is None:
+            self._content = Text(self.text, style=self._style or "")
+        return self._content
+
+    def render(self, console: Console) -> Strip:
+        if self._strip is None:
+            self._strip = Strip(self.content.render(console), self.cell_len)
+        return self._strip
+
+    def spans(
+        self, pattern: re.Pattern[str], generation: int
+    ) -> tuple[tuple[int, int], ...]:
+        """Spans of `pattern` matches, computed once per search generation."""
+        if self._spans_generation != generation:
+            self._spans = tuple(match.span() for match in pattern.finditer(self.text))
+            self._spans_generation = generation
+        return self._spans
+
+    def highlighted(
+        self,
+        pattern: re.Pattern[str],
+        generation: int,
+        selected: bool,
+        line_style: Style,
+        match_style: Style,
+        console: Console,
+    ) -> Strip:
+        """The line with search matches highlighted."""
+        key = (generation, selected)
+        if self._highlighted_key == key:
+            return self._highlighted
+
+        text = self.content.copy()
+        if selected:
+            text.stylize(line_style, 0, len(text))
+
+        spans = self.spans(pattern, generation)
+        if spans:
+            for start, end in spans:
+                text.stylize(match_style, start, end)
+        else:
+            text.stylize("dim")
+
+        self._highlighted = Strip(text.render(console), self.cell_len)
+        self._highlighted_key = key
+        return self._highlighted
+
+
 class LogLines(ScrollView, can_focus=True):
+    """A scrollable log of lines, rendered lazily for the visible rows only.
+
+    Lines are kept unrendered, so wrapping or resizing just re-computes which
+    rows each line covers. While wrapping, `_row_offsets` holds the (absolute)
+    first row of every line in `lines`.
+
+    Lines of the attached `LogIngest` take a cheaper path while `flood_guard`
+    detects a flood: they aren't highlighted, and identical consecutive lines
+    are written once with a repeat count.
+
+    While `structured`, lines are parsed as JSON in a worker, into `records`,
+    and JSON lines are shown as their `structured_columns`. A search made of
+    field filters, e.g "level>=warn trace_id=abc", is evaluated against
+    `records`.
+
+    With `grep`, only the lines matching the search, and `grep_context` lines
+    around each, are shown. Rows then map to the lines of `_grep_view`, which
+    is extended as lines are written instead of filtering them again.
+    """
+
+    FLUSH_INTERVAL = 1 / 30
+    """Seconds between writes of lines collected by the attached `LogIngest`."""
+
     COMPONENT_CLASSES = {
         "loglines--filter-highlight",
         "loglines--filter-highlight-selected",
+        "loglines--stderr",
     }
 
+    @dataclass
+    class MatchesChanged(Message):
+        """Lines were added to or dropped from `search_index`."""
+
+        log_lines: LogLines
+
     max_lines: var[int | None] = var[Optional[int]](None)
     min_width: var[int] = var(78)
     wrap: var[bool] = var(False)
     highlight: var[bool] = var(False)
     markup: var[bool] = var(False)
     auto_scroll: var[bool] = var(True)
+    structured: var[bool] = var(False)
+    grep: var[bool] = var(False)
+    grep_context: var[int] = var(2)
 
     def __init__(
         self,
@@ -48,168 +206,608 @@ class LogLines(ScrollView, can_focus=True):
         disabled: bool = False,
     ) -> None:
         super().__init__(name=name, id=id, classes=classes, disabled=disabled)
-        self.max_lines = max_lines
-        self.keyword = None
+        self.lines: RingBuffer[LogLine] = RingBuffer(max_lines)
+        self._row_offsets: RingBuffer[int] | None = None
+        self._rows_end = 0
+        self._wrap_width = min_width
+        self._keyword: str | None = None
+        self._case_sensitive: int = 0
+        self._pattern: re.Pattern[str] | None = None
+        self._search_generation = 0
+        self.search_index = SearchIndex()
         self.current_index = None
-        self.case_sensitive = False
-        self._start_line: int = 0
-        self.lines: list[Strip] = []
-        self._line_cache: LRUCache[tuple[int, int, int, int], Strip]
+        self._line_cache: LRUCache[tuple[int | bool | None, ...], Strip]
         self._line_cache = LRUCache(1024)
         self.max_width: int = 0
+        self._last_container_width: int = min_width
+        self._paint_style = Style()
+        self.structured_columns: tuple[str, ...] = ("ts", "level", "logger", "msg")
+        self.records = LogRecords(max_lines)
+        self._records_generation = 0
+        self._records_parsed = 0
+        """Absolute number of the next line to parse."""
+        self._pending_records: dict[int, list[Record | None]] = {}
+        self._stale_records: set[int] = set()
+        """Lines replaced while being parsed, to parse again once merged."""
+        self._filters: list[FieldFilter] | None = None
+        self._grep_view: GrepView | None = None
+        self.max_lines = max_lines
         self.min_width = min_width
         self.wrap = wrap
         self.highlight = highlight
         self.markup = markup
         self.auto_scroll = auto_scroll
-        self.highlighter: Highlighter = ReprHighlighter()
-        self._last_container_width: int = min_width
+        self.highlighter: Highlighter = LogHighlighter()
+        self._ingest: LogIngest | None = None
+        self.flood_guard = FloodGuard()
+        self._last_run: tuple[Run, int] | None = None
+        """The last run written while flooding, and its absolute line number."""
+
+    def on_mount(self) -> None:
+        self.set_interval(self.FLUSH_INTERVAL, self._flush_ingest)
+
+    def attach_ingest(
+        self, ingest: LogIngest | None, lines: RingBuffer[LogLine] | None = None
+    ) -> None:
+        """Start writing lines collected by `ingest`.
+
+        Args:
+            ingest: Source of new lines.
+            lines: Lines previously written from the same source, shown instead of
+                clearing the log. New lines are appended to this buffer.
+        """
+        self._ingest = ingest
+        self._last_run = None
+        if ingest is None:
+            self.flood_guard.reset()
+        else:
+            self.flood_guard.reset(ingest.received, ingest.dropped)
+        if lines is None:
+            self.clear()
+            return
+
+        self.lines = lines
+        self.search_index.clear()
+        self.current_index = None
+        if not self.structured:
+            self._restore_raw_lines()
+        self._reset_records()
+        self._reindex()
+        if self.auto_scroll:
+            self.scroll_end(animate=False)
+
+    def _flush_ingest(self) -> None:
+        if self._ingest is None:
+            return
+        lines = self._ingest.drain()
+        self.flood_guard.measure(self._ingest.received, self._ingest.dropped)
+        if not lines:
+            return
+        if self.flood_guard.flooding:
+            self._write_runs(self.flood_guard.thin(lines, self.FLUSH_INTERVAL))
+        else:
+            self.write_lines(lines)
+
+    def _write_runs(self, runs: list[Run]) -> None:
+        """Write runs of identical lines as one line each, extending the last line
+        written instead if the first run repeats it."""
+        stderr_style = self.get_component_rich_style("loglines--stderr")
+        if self._last_run is not None:
+            last, line_number = self._last_run
+            if runs[0].line == last.line and line_number == self.lines.end - 1:
+                runs[0] = Run(last.line, last.count + runs[0].count)
+                self.flood_guard.collapsed += 1
+                self._replace_last_line(self._make_run_line(runs[0], stderr_style))
+                self._last_run = (runs[0], line_number)
+                runs = runs[1:]
+                if not runs:
+                    return
+
+        self._append_lines(self._make_run_line(run, stderr_style) for run in runs)
+        self._last_run = (runs[-1], self.lines.end - 1)
+
+    def _make_run_line(self, run: Run, stderr_style: Style) -> LogLine:
+        text, stream = run.line
+        if run.count > 1:
+            text = f"{text} ×{run.count}"
+        if self.markup or "\x1b" in text or "\t" in text:
+            return self._make_lines(StreamLine(text, stream), highlight=False)[-1]
+        return LogLine(text, stream, stderr_style if stream == STDERR else None)
+
+    def _replace_last_line(self, line: LogLine) -> None:
+        number = self.lines.end - 1
+        matched = number in self.search_index
+        self.lines[-1] = line
+        self.max_width = max(self.max_width, line.cell_len)
+        if self._row_offsets is not None:
+            self._rows_end = self._row_offsets[-1] + self._line_height(line)
+        self._update_search_index(number)
+        self._update_record(number)
+        if self._grep_view is not None:
+            if (number in self.search_index) != matched:
+                self._build_grep_view()
+            else:
+                self._grep_view.resize_last(number, self._grep_height(line))
+        self._line_cache.clear()
+        self._update_virtual_size()
+        self.refresh()
+
+    @property
+    def _start_line(self) -> int:
+        """Absolute line number of the first line still in the buffer."""
+        return self.lines.start
+
+    @property
+    def keyword(self) -> str | None:
+        return self._keyword
+
+    @keyword.setter
+    def keyword(self, keyword: str | None) -> None:
+        if keyword != self._keyword:
+            self._keyword = keyword
+            self._compile_search()
+
+    @property
+    def case_sensitive(self) -> int:
+        """Flags used for the search pattern, `re.IGNORECASE` or 0."""
+        return self._case_sensitive
+
+    @case_sensitive.setter
+    def case_sensitive(self, flags: int) -> None:
+        if flags != self._case_sensitive:
+            self._case_sensitive = flags
+            self._compile_search()
+
+    def _compile_search(self) -> None:
+        self._search_generation += 1
+        self._filters = None
+        if self.structured and self._keyword:
+            self._filters = parse_filters(self._keyword)
+        if not self._keyword or self._filters is not None:
+            self._pattern = None
+            return
+        self._pattern = compile_search(self._keyword, self._case_sensitive)
+
+    def watch_max_lines(self, max_lines: int | None) -> None:
+        self.lines.capacity = max_lines
+        self._update_search_index(self.lines.end)
+        self._reset_records()
+        self._reindex()
+
+    def watch_structured(self, structured: bool) -> None:
+        if not structured:
+            self._restore_raw_lines()
+        self._reset_records()
+        self._compile_search()
+        self._reindex()
+
+    def _reset_records(self) -> None:
+        """Forget the records, parsing every line again if structured."""
+        self._records_generation += 1
+        self._pending_records.clear()
+        self._stale_records.clear()
+        self.records.reset(self.lines.start, self.lines.capacity)
+        self._records_parsed = self.lines.start
+        if self.structured:
+            self._parse_new_lines()
+
+    def _parse_new_lines(self) -> None:
+        """Parse the lines written since the last call, in a worker."""
+        start = self._records_parsed
+        if start == self.lines.end:
+            return
+        # Lines evicted before they were parsed keep their place, as non-JSON.
+        evicted = max(0, self.lines.start - start)
+        texts = [""] * evicted + [
+            line.source for line in self.lines[start + evicted - self.lines.start :]
+        ]
+        self._records_parsed = self.lines.end
+        self._parse_records(self._records_generation, start, texts)
+
+    @work(thread=True, group="structured")
+    def _parse_records(self, generation: int, start: int, texts: list[str]) -> None:
+        records = parse_records(texts)
+        self.app.call_from_thread(self._merge_records, generation, start, records)
+
+    def _merge_records(
+        self, generation: int, start: int, records: list[Record | None]
+    ) -> None:
+        """Add parsed records, in the order of their lines whichever worker
+        finished first, and show them."""
+        if generation != self._records_generation:
+            return
+        self._pending_records[start] = records
+        first = self.records.end
+        while (
+            records := self._pending_records.pop(self.records.end, None)
+        ) is not None:
+            start = self.records.end
+            self.records.extend(records)
+            self._show_records(start, records)
+        if first == self.records.end:
+            return
+        for number in [n for n in self._stale_records if n < self.records.end]:
+            self._stale_records.discard(number)
+            if number >= self.records.start:
+                self._parse_record(number)
+
+        filters = self.search_index.filters
+        if filters is None:
+            return
+        matches = self.records.matching(filters, first)
+        if self.search_index.add_matches(matches):
+            self.post_message(self.MatchesChanged(self))
+        if self._grep_view is not None:
+            self._update_grep_view(matches)
+            self._update_virtual_size()
+
+    def _update_record(self, number: int) -> None:
+        """Parse line `number` again after it was replaced, and test it against
+        the search's filters."""
+        if not self.structured or number >= self._records_parsed:
+            return  # Parsed along with the lines written next.
+        if number >= self.records.end:
+            self._stale_records.add(number)  # Being parsed from its former text.
+            return
+        if number < self.records.start:
+            return
+        self._parse_record(number)
+        filters = self.search_index.filters
+        if filters is not None and self.records.matching(filters, number):
+            self.search_index.add_matches([number])
+            self.post_message(self.MatchesChanged(self))
+
+    def _parse_record(self, number: int) -> None:
+        record = parse_record(self.lines.get(number).source)
+        self.records.set(number, record)
+        self._show_records(number, [record])
+
+    def _show_records(self, start: int, records: list[Record | None]) -> None:
+        """Show the lines with a record as the record's columns."""
+        changed = False
+        for number, record in enumerate(records, start):
+            if record is None or number < self.lines.start:
+                continue
+            line = self.lines.get(number)
+            if line.raw is not None:
+                continue  # Already shown structured, i.e cached by the session.
+            structured = LogLine(
+                render_record(record, self.structured_columns), line.stream
+            )
+            structured.raw = line.text
+            self.lines[number - self.lines.start] = structured
+            changed = True
+        if changed:
+            self._refresh_lines()
+
+    def _restore_raw_lines(self) -> None:
+        changed = False
+        for index, line in enumerate(self.lines):
+            if line.raw is not None:
+                raw = StreamLine(line.raw, line.stream)
+                self.lines[index] = self._make_lines(raw)[0]
+                changed = True
+        if changed:
+            self._refresh_lines()
+
+    def _refresh_lines(self) -> None:
+        """Repaint after lines were replaced."""
+        if self.wrap:
+            self._reindex()
+        else:
+            self._line_cache.clear()
+            self.refresh()
+
+    def watch_wrap(self) -> None:
+        self._reindex()
+        if self.auto_scroll:
+            self.scroll_end(animate=False)
+
+    def watch_grep(self) -> None:
+        line_number = self.current_index
+        self._reindex()
+        if self.auto_scroll:
+            self.scroll_end(animate=False)
+        elif line_number is not None:
+            self.scroll_to_line(line_number)
+
+    def watch_grep_context(self) -> None:
+        self._reindex()
+
+    def refresh_grep_view(self) -> None:
+        """Show the lines of a new search, or new matches of the scanned lines."""
+        if not self.grep:
+            return
+        self._build_grep_view()
+        self._line_cache.clear()
+        self._update_virtual_size()
+        self.refresh()
+
+    def _build_grep_view(self) -> None:
+        self._grep_view = None
+        index = self.search_index
+        if not self.grep or (index.pattern is None and index.filters is None):
+            return
+        self._grep_view = GrepView(self.grep_context)
+        self._grep_view.reset(self.lines.start)
+        self._grep_view.extend(index, self.lines.end, self._grep_line_height)
+
+    def _grep_line_height(self, line_number: int) -> int:
+        return self._grep_height(self.lines.get(line_number))
+
+    def _grep_height(self, line: LogLine) -> int:
+        return self._line_height(line) if self.wrap else 1
 
     def notify_style_update(self) -> None:
         self._line_cache.clear()
 
     def on_resize(self) -> None:
-        self._last_container_width = self.scrollable_content_region.width
+        width = self.scrollable_content_region.width
+        self._last_container_width = width or self._last_container_width
+        if self.wrap and self._get_wrap_width() != self._wrap_width:
+            self._reindex()
+
+    def _get_wrap_width(self) -> int:
+        return max(
+            self.scrollable_content_region.width or self._last_container_width, 1
+        )
 
-    def _make_renderable(self, content: RenderableType | object) -> RenderableType:
+    def _line_height(self, line: LogLine) -> int:
+        return max(1, -(-line.cell_len // self._wrap_width))
+
+    def _reindex(self) -> None:
+        """Re-compute the widest line and, if wrapping, the rows of every line."""
+        self.max_width = max((line.cell_len for line in self.lines), default=0)
+        self._row_offsets = None
+        if self.wrap:
+            self._wrap_width = self._get_wrap_width()
+            self._row_offsets = RingBuffer(self.lines.capacity)
+            self._row_offsets.start = self.lines.start
+            row = 0
+            for line in self.lines:
+                self._row_offsets.append(row)
+                row += self._line_height(line)
+            self._rows_end = row
+        self._build_grep_view()
+        self._line_cache.clear()
+        self._update_virtual_size()
+        self.refresh()
+
+    def _update_virtual_size(self) -> None:
+        if self._grep_view is not None:
+            width = self._wrap_width if self.wrap else self.max_width
+            self.virtual_size = Size(width, self._grep_view.rows)
+            return
+        if self._row_offsets is None:
+            self.virtual_size = Size(self.max_width, len(self.lines))
+            return
+        rows = self._rows_end - self._row_offsets[0] if self._row_offsets else 0
+        self.virtual_size = Size(self._wrap_width, rows)
+
+    def line_to_row(self, line_number: int) -> int:
+        """The first row of the line with absolute number `line_number`."""
+        if self._grep_view is not None:
+            return self._grep_view.row(self._grep_view.position(line_number))
+        index = line_number - self._start_line
+        if self._row_offsets is None:
+            return index
+        return self._row_offsets[index] - self._row_offsets[0]
+
+    def _row_to_line(self, row: int) -> tuple[int, int]:
+        """Index in `lines` of the line covering `row`, and the row within that line."""
+        if self._grep_view is not None:
+            position, row = self._grep_view.row_to_position(row)
+            if position >= len(self._grep_view):
+                return len(self.lines), 0
+            return self._grep_view[position] - self._start_line, row
+        if self._row_offsets is None:
+            return row, 0
+        if not self._row_offsets:
+            return 0, 0
+        row += self._row_offsets[0]
+        index = bisect_right(self._row_offsets, row) - 1
+        return index, row - self._row_offsets[index]
+
+    def scroll_to_line(self, line_number: int) -> None:
+        self.scroll_to(y=self.line_to_row(line_number), animate=False, duration=0)
+
+    def _make_renderable(
+        self, content: RenderableType | object, highlight: bool | None = None
+    ) -> RenderableType:
         renderable: RenderableType
+        stream = STDOUT
+        if isinstance(content, StreamLine):
+            content, stream = content
+
         if not is_renderable(content):
             renderable = Pretty(content)
         else:
             if isinstance(content, str):
                 if self.markup:
                     renderable = Text.from_markup(content)
+                elif "\x1b" in content:
+                    renderable = Text.from_ansi(content)
                 else:
                     renderable = Text(content)
-                if self.highlight:
-                    renderable = self.highlighter(renderable)
+                if self.highlight if highlight is None else highlight:
+                    # The text is new, highlight it without copying it first.
+                    self.highlighter.highlight(renderable)
             else:
                 renderable = cast(RenderableType, content)
 
         if isinstance(renderable, Text):
             renderable.expand_tabs()
+            if stream == STDERR:
+                renderable.stylize_before(
+                    self.get_component_rich_style("loglines--stderr")
+                )
 
         return renderable
 
+    def _make_lines(
+        self, content: RenderableType | object, highlight: bool | None = None
+    ) -> list[LogLine]:
+        stream = content.stream if isinstance(content, StreamLine) else STDOUT
+        renderable = self._make_renderable(content, highlight)
+
+        if isinstance(renderable, Text):
+            if "\n" not in renderable.plain:
+                return [LogLine(renderable, stream)]
+            texts = list(renderable.split("\n")) or [Text()]
+        else:
+            # Other renderables have no width of their own; lay them out once.
+            console = self.app.console
+            options = console.options.update_width(
+                max(self._last_container_width, self.min_width)
+            )
+            texts = [
+                Text.assemble(*((segment.text, segment.style) for segment in line))
+                for line in console.render_lines(renderable, options, pad=False)
+            ]
+        return [LogLine(text, stream) for text in texts]
+
     def write(
         self,
         content: RenderableType | object,
-        width: int | None = None,
-        expand: bool = False,
-        shrink: bool = True,
         scroll_end: bool | None = None,
     ) -> Self:
-        auto_scroll = self.auto_scroll if scroll_end is None else scroll_end
-
-        console = self.app.console
-        render_options = console.options
+        return self.write_lines([content], scroll_end)
 
-        renderable = self._make_renderable(content)
-
-        if isinstance(renderable, Text) and not self.wrap:
-            render_options = render_options.update(overflow="ignore", no_wrap=True)
-
-        render_width = measure_renderables(
-            console, render_options, [renderable]
-        ).maximum
-
-        container_width = (
-            self.scrollable_content_region.width if width is None else width
-        )
-
-        container_width = (
-            container_width if container_width else self._last_container_width
+    def write_lines(
+        self,
+        contents: Iterable[RenderableType | object],
+        scroll_end: bool | None = None,
+    ) -> Self:
+        """Write several pieces of content, resizing and scrolling once for all."""
+        self._last_run = None
+        return self._append_lines(
+            (line for content in contents for line in self._make_lines(content)),
+            scroll_end,
         )
 
-        if expand and render_width < container_width:
-            render_width = container_width
-        if shrink and render_width > container_width:
-            render_width = container_width
-
-        render_width = max(render_width, self.min_width)
+    def _append_lines(
+        self, lines: Iterable[LogLine], scroll_end: bool | None = None
+    ) -> Self:
+        auto_scroll = self.auto_scroll if scroll_end is None else scroll_end
 
-        segments = self.app.console.render(
-            renderable, render_options.update_width(render_width)
-        )
-        lines = list(Segment.split_lines(segments))
-        if not lines:
-            self.lines.append(Strip.blank(render_width))
-        else:
-            self.max_width = max(
-                self.max_width,
-                max(sum([segment.cell_length for segment in _line]) for _line in lines),
-            )
-            strips = Strip.from_lines(lines)
-            for strip in strips:
-                strip.adjust_cell_length(render_width)
-            self.lines.extend(strips)
-
-            if self.max_lines is not None and len(self.lines) > self.max_lines:
-                self._start_line += len(self.lines) - self.max_lines
-                self.refresh()
-                self.lines = self.lines[-self.max_lines :]
-        self.virtual_size = Size(self.max_width, len(self.lines))
+        start_line = self._start_line
+        end_line = self.lines.end
+        offsets = self._row_offsets
+        for line in lines:
+            self.lines.append(line)
+            self.max_width = max(self.max_width, line.cell_len)
+            if offsets is not None:
+                offsets.append(self._rows_end)
+                self._rows_end += self._line_height(line)
+
+        if self.lines.end == end_line:
+            return self
+        if self._start_line != start_line:
+            self.refresh()  # Lines were evicted, every row has shifted.
+        self._update_search_index(end_line)
+        if self._grep_view is not None:
+            self._update_grep_view(self.search_index.since(end_line))
+        self._update_virtual_size()
         if auto_scroll:
             self.scroll_end(animate=False)
+        if self.structured:
+            self._parse_new_lines()
 
         return self
 
+    def _update_grep_view(self, matches: Iterable[int]) -> None:
+        """Drop evicted lines from the grep view, and show new `matches` and the
+        context lines that arrived."""
+        view = self._grep_view
+        if view is None:
+            return
+        evicted = view.evict(self._start_line)
+        if view.extend(matches, self.lines.end, self._grep_line_height) or evicted:
+            self.refresh()
+
+    def _update_search_index(self, first_new_line: int) -> None:
+        """Evict and add matches after lines from `first_new_line` were written,
+        or replaced."""
+        evicted = self.search_index.evict(self._start_line)
+        evicted |= self.search_index.discard_from(first_new_line)
+        added = False
+        if self.search_index.pattern is not None:
+            first_new_line = max(first_new_line, self._start_line)
+            added = self.search_index.add_lines(
+                first_new_line, self.lines[first_new_line - self._start_line :]
+            )
+        if evicted or added:
+            self.post_message(self.MatchesChanged(self))
+
     def clear(self) -> Self:
         self.lines.clear()
-        self._line_cache.clear()
-        self._start_line = 0
-        self.max_width = 0
-        self.virtual_size = Size(self.max_width, len(self.lines))
-        self.refresh()
+        self._last_run = None
+        self._update_search_index(self.lines.end)
+        self._reset_records()
+        self._reindex()
         return self
 
     def render_line(self, y: int) -> Strip:
-        filter_style_line = self.get_component_rich_style("loglines--filter-highlight")
-        filter_style_word = self.get_component_rich_style(
-            "loglines--filter-highlight-selected"
-        )
         scroll_x, scroll_y = self.scroll_offset
-        line = self._render_line(scroll_y + y, scroll_x, self.size.width)
-        text = Text.from_ansi(line.text)
-
-        if self.keyword:
-            matches = list(
-                re.finditer(
-                    self.keyword,
-                    line.text,
-                    flags=self.case_sensitive,
-                )
-            )
-
-            if self.current_index == scroll_y + y:
-                text.stylize(filter_style_line, 0, text.cell_len)
-
-            if matches:
-                for match in matches:
-                    text.stylize(filter_style_word, *match.span())
-            else:
-                text.stylize("dim")
-
-            strip = Strip(text.render(self.app.console), text.cell_len)
-
-        else:
-            strip = line.apply_style(self.rich_style)
-
+        strip = self._render_line(scroll_y + y, scroll_x, self.size.width)
+        if self._pattern is None:
+            return strip.apply_style(self._paint_style)
         return strip
 
     def render_lines(self, crop: Region) -> list[Strip]:
+        # Computing the widget's style is costly, do it once and not per line.
+        self._paint_style = self.rich_style
         lines = self._styles_cache.render_widget(self, crop)
         return lines
 
     def _render_line(self, y: int, scroll_x: int, width: int) -> Strip:
-        if y >= len(self.lines):
-            return Strip.blank(width, self.rich_style)
-
-        key = (y + self._start_line, scroll_x, width, self.max_width)
+        index, row = self._row_to_line(y)
+        if index >= len(self.lines):
+            return Strip.blank(width, self._paint_style)
+
+        line_number = self._start_line + index
+        searching = self._pattern is not None or self._filters is not None
+        selected = searching and self.current_index == line_number
+        key = (
+            line_number,
+            row,
+            scroll_x,
+            width,
+            self._wrap_width if self.wrap else self.max_width,
+            self._search_generation if searching else None,
+            selected,
+        )
         if key in self._line_cache:
             return self._line_cache[key]
 
-        line = self.lines[y].crop_extend(scroll_x, scroll_x + width, self.rich_style)
+        line = self.lines[index]
+        console = self.app.console
+        if self._filters is not None:
+            strip = line.render(console)
+            if selected:
+                style = self.get_component_rich_style("loglines--filter-highlight")
+                strip = strip.apply_style(style)
+            elif line_number not in self.search_index:
+                strip = strip.apply_style(Style(dim=True))
+        elif self._pattern is None:
+            strip = line.render(console)
+        else:
+            strip = line.highlighted(
+                self._pattern,
+                self._search_generation,
+                selected,
+                self.get_component_rich_style("loglines--filter-highlight"),
+                self.get_component_rich_style("loglines--filter-highlight-selected"),
+                console,
+            )
+
+        if self.wrap:
+            start = row * self._wrap_width
+            strip = strip.crop(start, start + self._wrap_width).extend_cell_length(
+                width, self._paint_style
+            )
+        else:
+            strip = strip.crop_extend(scroll_x, scroll_x + width, self._paint_style)
 
-        self._line_cache[key] = line
-        return line
+        self._line_cache[key] = strip
+        return strip
@@ -0,0 +1,151 @@
+from typing import NamedTuple
+
+from rich.text import Text
+from textual.widgets import DataTable
+
+from application.docker_manager import DockerManager
+from application.util.container_stats import ContainerStats, format_bytes
+
+
+class Metric(NamedTuple):
+    """A cell sorted by its value and shown as its label."""
+
+    value: float
+    label: str
+
+    def __rich__(self) -> Text:
+        return Text(self.label, justify="right")
+
+
+NO_SAMPLE = Metric(-1, "-")
+
+
+class ContainerOverview(DataTable):
+    """Resource usage of every container, sortable by clicking a column header.
+
+    Containers are sampled by the docker manager's `FleetSampler` while the
+    overview is shown. Each tick only rows with a new sample are updated, and
+    the table only renders the rows on screen.
+    """
+
+    REFRESH_INTERVAL = 1.0
+    COLUMNS = (
+        ("Name", "name", None),
+        ("CPU %", "cpu", 8),
+        ("Memory", "memory", 10),
+        ("Mem %", "memory_percent", 7),
+        ("Net I/O", "net", 19),
+        ("Block I/O", "block", 19),
+        ("PIDs", "pids", 6),
+    )
+
+    def __init__(
+        self,
+        docker_manager: DockerManager,
+        *,
+        name: str | None = None,
+        id: str | None = None,
+        classes: str | None = None,
+        disabled: bool = False,
+    ) -> None:
+        super().__init__(
+            name=name,
+            id=id,
+            classes=classes,
+            disabled=disabled,
+            cursor_type="row",
+            zebra_stripes=True,
+        )
+        self.docker_manager = docker_manager
+        self._shown: dict[str, ContainerStats] = {}
+        self._sort_column: str | None = None
+        self._sort_reverse = False
+
+    def on_mount(self) -> None:
+        for label, key, width in self.COLUMNS:
+            self.add_column(label, key=key, width=width)
+        self._timer = self.set_interval(
+            self.REFRESH_INTERVAL, self._refresh_samples, pause=True
+        )
+
+    def on_show(self) -> None:
+        self._sync_rows()
+        self.docker_manager.fleet_sampler.start(
+            self.docker_manager.containers.containers()
+        )
+        self._timer.resume()
+
+    def on_hide(self) -> None:
+        self._timer.pause()
+        self.docker_manager.fleet_sampler.stop()
+
+    def on_data_table_header_selected(self, event: DataTable.HeaderSelected) -> None:
+        column = event.column_key.value
+        if column == self._sort_column:
+            self._sort_reverse = not self._sort_reverse
+        else:
+            # Highest usage first, names alphabetically.
+            self._sort_column, self._sort_reverse = column, column != "name"
+        self._sort()
+
+    def _sort(self) -> None:
+        if self._sort_column is not None:
+            self.sort(self._sort_column, reverse=self._sort_reverse)
+
+    def _sync_rows(self) -> None:
+        containers = {
+            container.id: container
+            for container in self.docker_manager.containers.containers()
+        }
+        for row_key in list(self.rows):
+            if row_key.value not in containers:
+                self.remove_row(row_key)
+                self._shown.pop(row_key.value, None)
+        for container_id, container in containers.items():
+            if container_id not in self.rows:
+                self.add_row(
+                    container.name,
+                    *[NO_SAMPLE] * (len(self.COLUMNS) - 1),
+                    key=container_id,
+                )
+        self.docker_manager.fleet_sampler.set_containers(list(containers.values()))
+
+    def _refresh_samples(self) -> None:
+        # Same count, other containers: e.g one removed as another was created.
+        if {row_key.value for row_key in self.rows} != {
+            entry.id for entry in self.docker_manager.containers
+        }:
+            self._sync_rows()
+
+        updated = False
+        for container_id, stats in list(
+            self.docker_manager.fleet_sampler.samples.items()
+        ):
+            if self._shown.get(container_id) is stats or container_id not in self.rows:
+                continue
+            self._shown[container_id] = stats
+            updated = True
+            for column, metric in self._metrics(stats).items():
+                self.update_cell(container_id, column, metric)
+
+        if updated:
+            self._sort()
+
+    @staticmethod
+    def _metrics(stats: ContainerStats) -> dict[str, Metric]:
+        return {
+            "cpu": Metric(stats.cpu_percent, f"{stats.cpu_percent:.2f}%"),
+            "memory": Metric(stats.memory_usage, format_bytes(stats.memory_usage)),
+            "memory_percent": Metric(
+                stats.memory_percent, f"{stats.memory_percent:.2f}%"
+            ),
+            "net": Metric(
+                stats.net_rx + stats.net_tx,
+                f"{format_bytes(stats.net_rx)} / {format_bytes(stats.net_tx)}",
+            ),
+            "block": Metric(
+                stats.block_read + stats.block_write,
+                f"{format_bytes(stats.block_read)} / {format_bytes(stats.block_write)}",
+            ),
+            "pids": Metric(stats.pids, str(stats.pids)),
+        }
@@ -1,8 +1,4 @@
-from application.widget.terminal import Terminal
-
-
 from rich.text import TextType
-from textual.app import ComposeResult
 from textual.widget import Widget
 from textual.widgets import (
     TabPane,
@@ -27,10 +23,17 @@ class ShellPane(TabPane):
             title, *children, name=name, id=id, classes=classes, disabled=disabled
         )
 
-    def compose(self) -> ComposeResult:
-        yield Terminal(id="shell-output")
+    def initialize(self) -> Widget:
+        """Start a shell in the selected container.
+
+        The terminal is added the first time, so its emulator is only imported
+        when a shell is opened.
+        """
+        from application.widget.terminal import Terminal
 
-    def initialize(self) -> None:
+        if not self.query("#shell-output"):
+            self.mount(Terminal(id="shell-output"))
         cmd = f"docker exec -it {self.docker_manager.selected_container.name} /bin/bash"
         terminal: Terminal = self.query_one("#shell-output")
         terminal.start(cmd)
+        return terminal
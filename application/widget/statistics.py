@@ -1,15 +1,22 @@
 from __future__ import annotations
 
+import time
+
 from textual.reactive import var
 from textual_plotext import PlotextPlot
 
+from application.util.time_series import TimeSeries
+
 
 class Statistics(PlotextPlot):
+    """Plot of a time series, which may be recorded into before the plot exists."""
+
     marker: var[str] = var("braille")
 
     def __init__(
         self,
         label: str,
+        series: TimeSeries,
         *,
         name: str | None = None,
         id: str | None = None,
@@ -18,28 +25,34 @@ class Statistics(PlotextPlot):
     ) -> None:
         super().__init__(name=name, id=id, classes=classes, disabled=disabled)
         self.label = label
-        self._data: list[float] = []
-        self._time: list[str] = []
+        self.series = series
 
     def on_mount(self) -> None:
         """Initialize the plot."""
         self.plt.date_form("M:S")
 
     def replot(self) -> None:
-        """Redraw the plot with updated usage data."""
+        """Redraw the plot, downsampled to one point per column of the widget.
+
+        Once there are more samples than columns, the minimum and maximum of
+        the samples in every column are drawn around their mean.
+        """
         self.plt.clear_data()
-        self.plt.plot(self._time, self._data, marker=self.marker, label=self.label)
+        if not self.series:
+            self.refresh()
+            return
+        points = self.series.downsample(max(self.size.width, 1))
+        times = [time.strftime("%M:%S", time.localtime(t)) for t in points.times]
+        self.plt.plot(times, points.means, marker=self.marker, label=self.label)
+        if points.minimums is not points.means:
+            self.plt.plot(times, points.maximums, marker=self.marker, color="gray")
+            self.plt.plot(times, points.minimums, marker=self.marker, color="gray")
         self.refresh()
 
-    def update(self, data: str, timestamp: str) -> None:
-        """Update the data for the usage plot.
+    def on_show(self) -> None:
+        self.replot()
 
-        Args:
-            data: The current value for a specific measurement.
-            timestamp: The current time as a string.
-        """
-        self._data.append(float(data))
-        self._time.append(timestamp)
+    def on_resize(self) -> None:
         self.replot()
 
     def _watch_marker(self) -> None:
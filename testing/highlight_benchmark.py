@@ -0,0 +1,105 @@
+"""Highlighting benchmark, comparing the log highlighter with Rich's ReprHighlighter.
+
+Highlights a generated log, of unique lines and of lines repeated as logs
+usually do, and fails when the log highlighter isn't at least `--min-speedup`
+times faster than ReprHighlighter on both.
+
+    python testing/highlight_benchmark.py [--lines 20000] [--runs 5] [--min-speedup 3]
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from rich.highlighter import Highlighter, ReprHighlighter
+from rich.text import Text
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+LEVELS = ("DEBUG", "INFO", "INFO", "INFO", "WARNING", "ERROR")
+TEMPLATES = (
+    "{time} [{level}] request id={n} path=/api/v1/items/{n} status=200 took {ms}ms",
+    "{time} {level} worker-{w} processed job {uuid} in {ms}.5ms",
+    (
+        '{{"time": "{time}", "level": "{level}", "msg": "cache miss", "key": "user:{n}",'
+        ' "hit": false, "trace_id": "{uuid}"}}'
+    ),
+    "{time} {level} connection from {ip}:{port} closed by peer",
+    "{level}: failed to reach https://api.example.com/v2/health?attempt={w} ({ms}ms)",
+    "{time} {level} GET /static/app.{n}.js HTTP/1.1 304 - {ms}ms",
+)
+
+
+def generate(count: int, repeated: bool, seed: int = 0) -> list[str]:
+    """Lines of a plausible log. With `repeated`, most lines are drawn from a
+    small pool instead of being unique, e.g health checks and retries."""
+    rng = random.Random(seed)
+
+    def line(n: int) -> str:
+        return rng.choice(TEMPLATES).format(
+            time=f"2024-05-01T12:{n // 60 % 60:02d}:{n % 60:02d}.{n % 1000:03d}Z",
+            level=rng.choice(LEVELS),
+            n=n,
+            ms=rng.randrange(1, 900),
+            w=rng.randrange(8),
+            uuid=f"{rng.getrandbits(128):032x}",
+            ip=f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(256)}",
+            port=rng.randrange(1024, 65535),
+        )
+
+    if not repeated:
+        return [line(n) for n in range(count)]
+    pool = [line(n) for n in range(50)]
+    return [rng.choice(pool) if rng.random() < 0.8 else line(n) for n in range(count)]
+
+
+def lines_per_second(
+    highlighter: Highlighter, lines: list[str], runs: int, reset: Callable[[], None]
+) -> float:
+    timings = []
+    for _ in range(runs):
+        reset()
+        start = time.perf_counter()
+        for line in lines:
+            highlighter.highlight(Text(line))
+        timings.append(time.perf_counter() - start)
+    return len(lines) / statistics.median(timings)
+
+
+def main() -> int:
+    from application.util.log_highlighter import LogHighlighter, _log_spans
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=20000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--min-speedup", type=float, default=3)
+    args = parser.parse_args()
+
+    failed = False
+    for name, repeated in (("unique lines", False), ("repeated lines", True)):
+        lines = generate(args.lines, repeated)
+        baseline = lines_per_second(ReprHighlighter(), lines, args.runs, lambda: None)
+        # Every run starts with an empty cache, so the gain isn't from warm runs.
+        optimized = lines_per_second(
+            LogHighlighter(), lines, args.runs, _log_spans.cache_clear
+        )
+        speedup = optimized / baseline
+        print(
+            f"{name:>14}: ReprHighlighter {baseline:>10,.0f} lines/s"
+            f" | LogHighlighter {optimized:>10,.0f} lines/s | {speedup:.1f}x"
+        )
+        if speedup < args.min_speedup:
+            print(f"FAIL: {name} less than {args.min_speedup:.1f}x faster")
+            failed = True
+
+    if not failed:
+        print(f"\nOK: at least {args.min_speedup:.1f}x faster")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""Startup benchmark, importing Pocker's entry point in fresh interpreters.
+
+Fails when the median import time exceeds the budget, or when a dependency
+that should only be imported on first use is imported at startup.
+
+    python testing/startup_benchmark.py [--runs 10] [--budget-ms 700] [--top 15]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+ENTRY_POINT = "application.main"
+
+# Imported by subcommands, screens and tabs when they are first used.
+DEFERRED = (
+    "colorama",
+    "concurrent.futures.process",
+    "markdown_it",
+    "plotext",
+    "pyte",
+    "textual_plotext",
+    "yaspin",
+    "application.widget.help",
+    "application.widget.overview",
+    "application.widget.settings",
+    "application.widget.startup_error_modal",
+    "application.widget.statistics",
+    "application.widget.terminal",
+)
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "modules": sorted(sys.modules)}}))
+"""
+
+
+def run_once() -> tuple[float, set[str]]:
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=ENTRY_POINT)],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    data = json.loads(result.stdout.splitlines()[-1])
+    return data["seconds"], set(data["modules"])
+
+
+def slowest_modules(count: int) -> list[tuple[int, str]]:
+    """The modules taking the longest to import themselves, in microseconds."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {ENTRY_POINT}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    timings = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, _, module = line.removeprefix("import time:").split("|")
+        timings.append((int(own), module.strip()))
+    return sorted(timings, reverse=True)[:count]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=700)
+    parser.add_argument("--top", type=int, default=15, help="slowest modules shown")
+    args = parser.parse_args()
+
+    run_once()  # Warm up the bytecode and file system caches.
+    times = []
+    for _ in range(args.runs):
+        seconds, modules = run_once()
+        times.append(seconds * 1000)
+    median = statistics.median(times)
+
+    print(f"import {ENTRY_POINT}: median {median:.1f} ms", end="")
+    print(f" (min {min(times):.1f}, max {max(times):.1f}, {args.runs} runs)")
+    if args.top:
+        print("\nSlowest modules (self time):")
+        for own, module in slowest_modules(args.top):
+            print(f"  {own / 1000:8.1f} ms  {module}")
+
+    failed = False
+    if median > args.budget_ms:
+        print(f"\nFAIL: median exceeds the budget of {args.budget_ms:.0f} ms")
+        failed = True
+    eager = [module for module in DEFERRED if module in modules]
+    if eager:
+        print(f"\nFAIL: imported at startup instead of on first use: {eager}")
+        failed = True
+    if not failed:
+        print(f"\nOK: within the budget of {args.budget_ms:.0f} ms")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())